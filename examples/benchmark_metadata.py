@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+"""Benchmark comparing the decoding of audio.metadata messages with the JSON
+decoders that are installed against extracting only the boundary"""
+
+import json
+import time
+from typing import Any, Callable, List, Tuple
+
+from edge_tts.metadata import extract_boundary, parse_metadata
+
+MESSAGES = 100_000
+ROUNDS = 5
+METADATA = (
+    '{{"Metadata":[{{"Type":"WordBoundary","Data":{{"Offset":{offset},'
+    '"Duration":{duration},"text":{{"Text":"{text}","Length":{length},'
+    '"BoundaryType":"WordBoundary"}}}}}}]}}'
+)
+
+
+def record_messages() -> List[str]:
+    """Returns the bodies of the audio.metadata messages of a session in the
+    format they are received in."""
+    messages = []
+    for i in range(MESSAGES):
+        text = ("façade", "word", "这是", "&amp;")[i % 4]
+        messages.append(
+            METADATA.format(
+                offset=1_000_000 + i * 2_400_000,
+                duration=2_000_000,
+                text=text,
+                length=len(text),
+            )
+        )
+    return messages
+
+
+def decoders() -> List[Tuple[str, Callable[[str], Any]]]:
+    """Returns the JSON decoders that are installed."""
+    found: List[Tuple[str, Callable[[str], Any]]] = [("json", json.loads)]
+    try:
+        import orjson  # pylint: disable=import-outside-toplevel
+
+        found.append(("orjson", orjson.loads))
+    except ImportError:
+        pass
+    try:
+        import msgspec  # pylint: disable=import-outside-toplevel
+
+        found.append(("msgspec", msgspec.json.decode))
+    except ImportError:
+        pass
+    return found
+
+
+def main() -> None:
+    """Main function"""
+    messages = record_messages()
+
+    def decode_with(loads: Callable[[str], Any]) -> Callable[[str], Any]:
+        def decode(data: str) -> Any:
+            data_obj = loads(data)["Metadata"][0]["Data"]
+            return (
+                data_obj["Offset"],
+                data_obj["Duration"],
+                data_obj["text"]["Text"],
+            )
+
+        return decode
+
+    candidates = [(name, decode_with(loads)) for name, loads in decoders()]
+    candidates.append(("extract", extract_boundary))
+    candidates.append(("parse", parse_metadata))
+    for name, parse in candidates:
+        best = float("inf")
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            for message in messages:
+                parse(message)
+            best = min(best, time.perf_counter() - start)
+        print(f"{name:>8}: {best / len(messages) * 1e6:5.2f} us/message")
+
+
+if __name__ == "__main__":
+    main()
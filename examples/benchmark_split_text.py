@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+
+"""Benchmark showing that splitting text into chunks for the service scales
+linearly with the size of the text"""
+
+import time
+
+from edge_tts.text import split_text_by_byte_length
+
+SIZES_MB = (1, 10, 100)
+PARAGRAPH = (
+    "It was the best of times, it was the worst of times &amp; it was the age "
+    "of wisdom. Ça ne fait rien, 这是一个测试 😀 it was the age of foolishness.\n"
+).encode("utf-8")
+
+
+def main() -> None:
+    """Main function"""
+    for size_mb in SIZES_MB:
+        text = PARAGRAPH * (size_mb * 1024 * 1024 // len(PARAGRAPH))
+        start = time.perf_counter()
+        chunks = sum(1 for _ in split_text_by_byte_length(text, 4096))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{size_mb:>4} MB: {chunks:>6} chunks in {elapsed:8.3f} s "
+            f"({elapsed / size_mb * 1000:6.2f} ms/MB)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+"""Benchmark comparing the parsing of the text messages of a WordBoundary-heavy
+session as str against encoding them to bytes first"""
+
+import json
+import time
+from typing import List
+
+from edge_tts.protocol import get_headers_and_data, parse_text_message
+
+WORDS = 100_000
+ROUNDS = 5
+HEADERS = (
+    "X-RequestId:2c83c0a2a9ec4d5cb3e2a2f4f0b2f9a1\r\n"
+    "Content-Type:application/json; charset=utf-8\r\n"
+    "Path:{path}\r\n\r\n"
+)
+METADATA = (
+    '{{"Metadata":[{{"Type":"WordBoundary","Data":{{"Offset":{offset},'
+    '"Duration":{duration},"text":{{"Text":"{text}","Length":{length},'
+    '"BoundaryType":"WordBoundary"}}}}}}]}}'
+)
+
+
+def record_session() -> List[str]:
+    """Returns the text messages the service sends for a session of WORDS words,
+    in the format they are received in."""
+    messages = [
+        HEADERS.format(path="turn.start") + '{"context":{"serviceTag":"0"}}',
+        HEADERS.format(path="response") + '{"context":{"serviceTag":"0"}}',
+    ]
+    for i in range(WORDS):
+        text = ("façade", "word", "这是", "&amp;")[i % 4]
+        messages.append(
+            HEADERS.format(path="audio.metadata")
+            + METADATA.format(
+                offset=1_000_000 + i * 2_400_000,
+                duration=2_000_000,
+                text=text,
+                length=len(text),
+            )
+        )
+    messages.append(HEADERS.format(path="turn.end") + "{}")
+    return messages
+
+
+def parse_as_bytes(messages: List[str]) -> int:
+    """Parses the messages the way they used to be parsed, as bytes."""
+    boundaries = 0
+    for message in messages:
+        encoded_data = message.encode("utf-8")
+        parameters, data = get_headers_and_data(
+            encoded_data, encoded_data.find(b"\r\n\r\n")
+        )
+        if parameters.get(b"Path") == b"audio.metadata":
+            boundaries += len(json.loads(data)["Metadata"])
+    return boundaries
+
+
+def parse_as_str(messages: List[str]) -> int:
+    """Parses the messages as they were received, as str."""
+    boundaries = 0
+    for message in messages:
+        path, body = parse_text_message(message)
+        if path == "audio.metadata":
+            boundaries += len(json.loads(body)["Metadata"])
+    return boundaries
+
+
+def main() -> None:
+    """Main function"""
+    messages = record_session()
+    for name, parse in (("bytes", parse_as_bytes), ("str", parse_as_str)):
+        best = float("inf")
+        for _ in range(ROUNDS):
+            start = time.perf_counter()
+            boundaries = parse(messages)
+            best = min(best, time.perf_counter() - start)
+        print(
+            f"{name:>5}: {boundaries} boundaries in {best:6.3f} s "
+            f"({best / len(messages) * 1e6:5.2f} us/message)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+"""Benchmark comparing the websocket transports that are installed, by the
+time to first audio and the total time of the same synthesis"""
+
+import asyncio
+import time
+from typing import Optional, Tuple
+
+import edge_tts
+from edge_tts.transport import TRANSPORTS
+
+TEXT = "Hello World! " * 200
+VOICE = "en-GB-SoniaNeural"
+ROUNDS = 3
+
+
+async def synthesize(transport: str) -> Tuple[Optional[float], float]:
+    """Returns the time to first audio and the total time of a synthesis."""
+    async with edge_tts.CommunicatePool(1, transport=transport) as pool:
+        communicate = edge_tts.Communicate(
+            TEXT, VOICE, pool=pool, boundary="WordBoundary"
+        )
+
+        # Open the connection first, so that only the synthesis is measured.
+        await pool.warm(communicate.tts_config)
+
+        start = time.perf_counter()
+        first_audio = None
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio" and first_audio is None:
+                first_audio = time.perf_counter() - start
+        return first_audio, time.perf_counter() - start
+
+
+async def amain() -> None:
+    """Main function"""
+    for transport in TRANSPORTS:
+        try:
+            results = [await synthesize(transport) for _ in range(ROUNDS)]
+        except ImportError:
+            print(f"{transport:>10}: not installed")
+            continue
+        # A synthesis that succeeded always received audio.
+        first_audio = min(result[0] or 0.0 for result in results)
+        total = min(result[1] for result in results)
+        print(
+            f"{transport:>10}: first audio in {first_audio:6.3f} s, "
+            f"done in {total:6.3f} s"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(amain())
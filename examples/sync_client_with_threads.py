@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+
+"""Example of sharing a SyncClient between the threads of a worker, so that
+they reuse one event loop and its warm connections"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import edge_tts
+
+TEXTS = [f"This is request number {i}." for i in range(16)]
+VOICE = "en-GB-SoniaNeural"
+
+
+def main() -> None:
+    """Main function"""
+    with edge_tts.SyncClient(max_connections=4) as client:
+
+        def handle(index: int) -> None:
+            with open(f"test{index}.mp3", "wb") as file:
+                file.write(client.synthesize(TEXTS[index], VOICE))
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(handle, range(len(TEXTS))))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,14 +2,26 @@
 needing Windows or the Edge browser."""
 
 from . import exceptions
+from .cache import Cache, FileCache, MemoryCache
+from .client import SyncClient
 from .communicate import Communicate
+from .connection import CommunicatePool
+from .data_classes import DialogueSegment
+from .dialogue import Dialogue
 from .submaker import SubMaker
 from .version import __version__, __version_info__
 from .voices import VoicesManager, list_voices
 
 __all__ = [
     "Communicate",
+    "CommunicatePool",
+    "Cache",
+    "FileCache",
+    "MemoryCache",
+    "Dialogue",
+    "DialogueSegment",
     "SubMaker",
+    "SyncClient",
     "exceptions",
     "__version__",
     "__version_info__",
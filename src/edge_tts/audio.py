@@ -0,0 +1,235 @@
+"""Audio module is used to measure the duration of the audio data sent by the
+service, so that the offsets of consecutive turns can be placed on a single
+timeline without relying on an estimate of the padding added to each turn."""
+
+import re
+from bisect import bisect_left
+from typing import List, Optional, Sequence, Tuple, Union
+
+# Bitrates in kbps indexed by [MPEG-1][layer][bitrate index], where layer
+# is 1, 2 or 3. MPEG-2 and MPEG-2.5 share the same table.
+_BITRATES = {
+    True: {
+        1: (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+        2: (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+        3: (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    },
+    False: {
+        1: (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+        2: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+        3: (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    },
+}
+
+# Sample rates in Hz indexed by the version bits of the header.
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),  # MPEG-2.5
+    2: (22050, 24000, 16000),  # MPEG-2
+    3: (44100, 48000, 32000),  # MPEG-1
+}
+
+# Number of 100-nanosecond ticks in a second, the unit used for offsets.
+TICKS_PER_SECOND = 10_000_000
+
+
+def parse_mpeg_frame_header(
+    header: Union[bytes, memoryview],
+) -> Optional[Tuple[int, int, int]]:
+    """
+    Parses the 4-byte header of an MPEG audio frame.
+
+    Args:
+        header (bytes or memoryview): The first four bytes of the frame.
+
+    Returns:
+        Optional[Tuple[int, int, int]]: The frame length in bytes, the number
+            of samples in the frame and the sample rate, or None if the bytes
+            are not a valid frame header.
+    """
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    sample_rate_index = (header[2] >> 2) & 0x03
+    padding = (header[2] >> 1) & 0x01
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = _BITRATES[mpeg1][layer][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4, 384, sample_rate
+    if layer == 2 or mpeg1:
+        return 144 * bitrate // sample_rate + padding, 1152, sample_rate
+    return 72 * bitrate // sample_rate + padding, 576, sample_rate
+
+
+class DurationCounter:
+    """
+    Measures the duration of an audio stream. The base class is used for
+    formats whose duration cannot be measured, and always measures zero.
+    """
+
+    def feed(self, data: Union[bytes, memoryview]) -> None:
+        """
+        Feeds the next piece of the audio stream.
+
+        Args:
+            data (bytes or memoryview): The audio data.
+        """
+
+    @property
+    def duration(self) -> int:
+        """
+        The duration of the audio fed so far.
+
+        Returns:
+            int: The duration in 100-nanosecond ticks.
+        """
+        return 0
+
+
+class PCMDurationCounter(DurationCounter):
+    """
+    Measures the duration of a raw 16-bit mono PCM stream by its length.
+    """
+
+    def __init__(self, sample_rate: int) -> None:
+        self.sample_rate = sample_rate
+        self.length = 0
+
+    def feed(self, data: Union[bytes, memoryview]) -> None:
+        self.length += len(data)
+
+    @property
+    def duration(self) -> int:
+        return self.length // 2 * TICKS_PER_SECOND // self.sample_rate
+
+
+class MP3DurationCounter(DurationCounter):
+    """
+    Measures the duration of an MP3 stream by walking its frame headers.
+
+    The stream can be fed in arbitrary pieces; frames that span several
+    pieces are handled, and bytes that are not part of a frame are skipped.
+    """
+
+    def __init__(self) -> None:
+        self.buffer = b""
+        self.skip = 0
+        self.samples = 0
+        self.sample_rate = 0
+        self.ticks = 0
+
+    def feed(self, data: Union[bytes, memoryview]) -> None:
+        """
+        Feeds the next piece of the MP3 stream.
+
+        Args:
+            data (bytes or memoryview): The audio data.
+        """
+        # Skip the remainder of a frame that started in a previous piece.
+        if self.skip >= len(data):
+            self.skip -= len(data)
+            return
+        if self.buffer:
+            data = self.buffer + data
+            self.buffer = b""
+
+        position = self.skip
+        self.skip = 0
+        while position < len(data):
+            if len(data) - position < 4:
+                # Wait for the rest of the header.
+                self.buffer = bytes(data[position:])
+                return
+
+            frame = parse_mpeg_frame_header(data[position : position + 4])
+            if frame is None:
+                # Not a frame header, look for the next one.
+                position += 1
+                continue
+
+            frame_length, samples, sample_rate = frame
+            if sample_rate != self.sample_rate:
+                self.ticks = self.duration
+                self.samples = 0
+                self.sample_rate = sample_rate
+            self.samples += samples
+            position += frame_length
+
+        self.skip = position - len(data)
+
+    @property
+    def duration(self) -> int:
+        if self.sample_rate == 0:
+            return self.ticks
+        return self.ticks + self.samples * TICKS_PER_SECOND // self.sample_rate
+
+
+def duration_counter(output_format: str) -> DurationCounter:
+    """
+    Returns a counter that measures the duration of audio in the given format.
+
+    Args:
+        output_format (str): The output format, such as
+            audio-24khz-48kbitrate-mono-mp3.
+
+    Returns:
+        DurationCounter: The counter, which measures zero for formats whose
+            duration cannot be measured.
+    """
+    if output_format.endswith("-mp3"):
+        return MP3DurationCounter()
+    match = re.match(r"^raw-(\d+)khz-16bit-mono-pcm$", output_format)
+    if match is not None:
+        return PCMDurationCounter(int(match.group(1)) * 1000)
+    return DurationCounter()
+
+
+def split_mp3(data: bytes, cuts: Sequence[int]) -> List[Tuple[bytes, int]]:
+    """
+    Splits an MP3 stream at the frame boundaries closest to the given times.
+
+    Args:
+        data (bytes): The MP3 stream.
+        cuts (Sequence[int]): The times to split at in 100-nanosecond ticks,
+            in increasing order.
+
+    Returns:
+        List[Tuple[bytes, int]]: One piece more than there are cuts, each with
+            the time in ticks at which the piece starts in the stream.
+    """
+    # Find where every frame starts, in bytes and in time. Bytes that are not
+    # part of a frame stay with the frame after them.
+    positions = [0]
+    times = [0]
+    counter = MP3DurationCounter()
+    position = 0
+    while position <= len(data) - 4:
+        frame = parse_mpeg_frame_header(data[position : position + 4])
+        if frame is None:
+            position += 1
+            continue
+        counter.feed(data[position : position + frame[0]])
+        position += frame[0]
+        positions.append(min(position, len(data)))
+        times.append(counter.duration)
+
+    pieces: List[Tuple[bytes, int]] = []
+    start = 0
+    for cut in cuts:
+        # Use the frame boundary closest to the cut, but never go backwards.
+        index = bisect_left(times, cut)
+        if index == len(times) or (
+            index > 0 and cut - times[index - 1] <= times[index] - cut
+        ):
+            index -= 1
+        index = max(index, start)
+        pieces.append((data[positions[start] : positions[index]], times[start]))
+        start = index
+    pieces.append((data[positions[start] :], times[start]))
+    return pieces
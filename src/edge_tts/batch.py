@@ -0,0 +1,125 @@
+"""Batch module is used to pack many short texts into as few turns as possible,
+and to split the audio and boundaries of those turns back out per text."""
+
+from bisect import bisect_right
+from typing import Generator, Hashable, List, Sequence, Tuple, TypeVar
+
+from .audio import split_mp3
+from .text import prepare_text
+from .typing import BatchResult, TTSChunk
+
+K = TypeVar("K", bound=Hashable)
+
+# Sentence terminators, and the closing quotes and brackets that may follow
+# them, which already end an item.
+_TERMINATORS = (".", "!", "?", "…", "。", "！", "？")
+_CLOSERS = "\"')]”’」』）"
+
+
+def terminate_sentence(text: str) -> str:
+    """
+    Returns the text as a sentence of its own, so that packed texts are not
+    read as one sentence.
+
+    Args:
+        text (str): The text of an item.
+
+    Returns:
+        str: The text, stripped and ending with a sentence terminator.
+    """
+    text = text.strip()
+    if not text or text.rstrip(_CLOSERS).endswith(_TERMINATORS):
+        return text
+    return text + "."
+
+
+def pack_items(
+    items: Sequence[Tuple[K, str]], byte_length: int
+) -> Generator[List[Tuple[K, str]], None, None]:
+    """
+    Packs consecutive items into groups whose texts, joined by newlines, fit in
+    a single turn. An item that is too long on its own is a group of its own.
+
+    Args:
+        items (Sequence[Tuple[K, str]]): The ids and sentence-terminated texts.
+        byte_length (int): The maximum byte length of the text of a turn.
+
+    Yields:
+        List[Tuple[K, str]]: The groups of items.
+    """
+    group: List[Tuple[K, str]] = []
+    group_length = 0
+    for item in items:
+        # The texts are joined by a newline, which takes one byte.
+        length = len(prepare_text(item[1])) + 1
+        if group and group_length + length - 1 > byte_length:
+            yield group
+            group, group_length = [], 0
+        group.append(item)
+        group_length += length
+    if group:
+        yield group
+
+
+def _assign_boundaries(
+    texts: Sequence[str], boundaries: List[TTSChunk]
+) -> List[List[TTSChunk]]:
+    """Returns the boundaries of every text, found by their own text."""
+    starts = []
+    joined_length = 0
+    for text in texts:
+        starts.append(joined_length)
+        joined_length += len(text) + 1
+    joined = "\n".join(texts)
+
+    assigned: List[List[TTSChunk]] = [[] for _ in texts]
+    index = cursor = 0
+    for boundary in boundaries:
+        found = joined.find(boundary["text"], cursor) if boundary["text"] else -1
+        if found >= 0:
+            # Boundaries are in order, so a text is never returned to.
+            index = max(index, bisect_right(starts, found) - 1)
+            cursor = found + len(boundary["text"])
+        assigned[index].append(boundary)
+    return assigned
+
+
+def split_batch(texts: Sequence[str], messages: List[TTSChunk]) -> List[BatchResult]:
+    """
+    Splits the audio and boundaries of texts that were synthesized together,
+    joined by newlines, into the audio and boundaries of every text.
+
+    A boundary belongs to the text its own text was found in. The audio is
+    split at the MP3 frame closest to the middle of the silence between the
+    last boundary of a text and the first boundary of the next one.
+
+    Args:
+        texts (Sequence[str]): The texts in the order they were joined.
+        messages (List[TTSChunk]): The audio and boundaries of the joined texts.
+
+    Returns:
+        List[BatchResult]: The audio and boundaries of every text, with offsets
+            relative to the start of its audio. A text that no boundary was
+            found for gets no audio of its own.
+    """
+    audio = b"".join(m["data"] for m in messages if m["type"] == "audio")
+    cues = _assign_boundaries(
+        texts,
+        [m for m in messages if m["type"] in ("WordBoundary", "SentenceBoundary")],
+    )
+
+    # Split the audio between consecutive texts that have boundaries.
+    voiced = [i for i, text_cues in enumerate(cues) if text_cues]
+    split_points = []
+    for previous, following in zip(voiced, voiced[1:]):
+        end = max(c["offset"] + c["duration"] for c in cues[previous])
+        start = min(c["offset"] for c in cues[following])
+        split_points.append(int(end + start) // 2)
+    pieces = split_mp3(audio, split_points) if voiced else []
+
+    results: List[BatchResult] = [{"audio": b"", "cues": []} for _ in texts]
+    for i, (data, offset) in zip(voiced, pieces):
+        for cue in cues[i]:
+            cue["offset"] -= offset
+        results[i] = {"audio": data, "cues": cues[i]}
+    return results
@@ -0,0 +1,325 @@
+"""Cache module is used to store the audio and metadata of synthesized turns,
+so that text that was already synthesized with the same settings can be
+replayed without a request to the service."""
+
+import asyncio
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .typing import TTSChunk
+
+# Suffix of the files that hold cache entries.
+_ENTRY_SUFFIX = ".tts"
+
+
+def cache_key(speech_config: str, ssml: str) -> str:
+    """
+    Returns the cache key of a turn.
+
+    The speech.config body covers the boundary type and the output format,
+    while the SSML covers the voice, rate, volume, pitch and the text itself.
+
+    Args:
+        speech_config (str): The body of the speech.config message.
+        ssml (str): The SSML of the turn.
+
+    Returns:
+        str: The hex digest identifying the turn.
+    """
+    digest = hashlib.sha256()
+    digest.update(speech_config.encode("utf-8"))
+    digest.update(b"\0")
+    digest.update(ssml.encode("utf-8"))
+    return digest.hexdigest()
+
+
+class Cache(ABC):
+    """
+    Base class of the caches that can be used by Communicate.
+
+    An entry holds the messages of a single turn, the audio and the boundaries
+    with offsets relative to the start of the turn. A cache can be shared by
+    any number of Communicate instances running on the same event loop; a turn
+    that is already being synthesized by one of them is waited for by the
+    others instead of being requested again.
+
+    Communicate looks up and stores turns with get_async() and put_async(),
+    which call get() and put() on the event loop unless a cache that blocks
+    on I/O overrides them.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.size = 0
+
+        # The keys of the turns being synthesized after a miss, which are set
+        # once the turn was stored or failed.
+        self.pending: Dict[str, asyncio.Event] = {}
+
+    @property
+    def hit_ratio(self) -> float:
+        """
+        The share of lookups that were answered from the cache.
+
+        Returns:
+            float: The hit ratio, or 0.0 if there were no lookups yet.
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[List[TTSChunk]]:
+        """
+        Returns the messages of the turn with the given key.
+
+        Args:
+            key (str): The key returned by cache_key().
+
+        Returns:
+            Optional[List[TTSChunk]]: The messages, which the caller may modify,
+                or None if the turn is not cached.
+        """
+
+    @abstractmethod
+    def put(self, key: str, messages: List[TTSChunk]) -> None:
+        """
+        Stores the messages of a turn that was synthesized completely.
+
+        Args:
+            key (str): The key returned by cache_key().
+            messages (List[TTSChunk]): The messages of the turn.
+        """
+
+    async def get_async(self, key: str) -> Optional[List[TTSChunk]]:
+        """Like get(), without blocking the event loop."""
+        return self.get(key)
+
+    async def put_async(self, key: str, messages: List[TTSChunk]) -> None:
+        """Like put(), without blocking the event loop."""
+        self.put(key, messages)
+
+
+class FileCache(Cache):
+    """
+    A cache that stores every turn in its own file in a directory.
+
+    Entries are written atomically, so a directory can be shared by several
+    processes. Once the entries take up more than `max_size` bytes, the least
+    recently used ones are removed.
+
+    Communicate reads and writes the entries on worker threads, so that the
+    event loop does not wait on the disk.
+    """
+
+    def __init__(
+        self,
+        directory: Union[str, "os.PathLike[str]"],
+        max_size: int = 512 * 1024 * 1024,
+    ) -> None:
+        super().__init__()
+
+        # Validate the directory parameter.
+        if not isinstance(directory, (str, os.PathLike)):
+            raise TypeError("directory must be str or os.PathLike")
+        self.directory = os.fspath(directory)
+
+        # Validate the max_size parameter.
+        if not isinstance(max_size, int):
+            raise TypeError("max_size must be int")
+        if max_size <= 0:
+            raise ValueError("max_size must be greater than 0")
+        self.max_size = max_size
+
+        # The sizes of the entries from the least to the most recently used,
+        # which are read from the directory the first time they are needed.
+        self.entries: Optional["OrderedDict[str, int]"] = None
+
+        # Guards the entries and the counters, which are updated by the
+        # worker threads. Files are read and written without holding it.
+        self.lock = threading.Lock()
+
+    def __path(self, key: str) -> str:
+        return os.path.join(self.directory, key + _ENTRY_SUFFIX)
+
+    def __load_entries(self) -> "OrderedDict[str, int]":
+        """Reads the entries in the directory, oldest first."""
+        if self.entries is not None:
+            return self.entries
+
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(_ENTRY_SUFFIX) and entry.is_file():
+                    stat = entry.stat()
+                    key = entry.name[: -len(_ENTRY_SUFFIX)]
+                    found.append((stat.st_mtime, key, stat.st_size))
+        found.sort()
+
+        self.entries = OrderedDict((key, size) for _, key, size in found)
+        self.size = sum(self.entries.values())
+        self.__evict()
+        return self.entries
+
+    def __remove(self, key: str) -> None:
+        entries = self.__load_entries()
+        self.size -= entries.pop(key, 0)
+        try:
+            os.remove(self.__path(key))
+        except FileNotFoundError:
+            pass
+
+    def __evict(self) -> None:
+        """Removes the least recently used entries until the cache fits."""
+        entries = self.__load_entries()
+        while self.size > self.max_size:
+            self.__remove(next(iter(entries)))
+
+    def get(self, key: str) -> Optional[List[TTSChunk]]:
+        with self.lock:
+            entries = self.__load_entries()
+        path = self.__path(key)
+        try:
+            with open(path, "rb") as f:
+                header: List[Dict[str, Any]] = json.loads(f.readline())
+                messages: List[TTSChunk] = []
+                for message in header:
+                    if message["type"] == "audio":
+                        data = f.read(message["size"])
+                        if len(data) != message["size"]:
+                            raise ValueError("Truncated cache entry")
+                        messages.append({"type": "audio", "data": data})
+                    else:
+                        messages.append(
+                            {
+                                "type": message["type"],
+                                "offset": message["offset"],
+                                "duration": message["duration"],
+                                "text": message["text"],
+                            }
+                        )
+        except FileNotFoundError:
+            # The entry was never written, or removed by another process.
+            with self.lock:
+                self.size -= entries.pop(key, 0)
+                self.misses += 1
+            return None
+        except (ValueError, KeyError, TypeError):
+            # The entry is corrupt, so it is synthesized again.
+            with self.lock:
+                self.__remove(key)
+                self.misses += 1
+            return None
+
+        with self.lock:
+            self.hits += 1
+            try:
+                # Mark the entry as recently used, also for other processes.
+                os.utime(path)
+                size = os.path.getsize(path)
+            except FileNotFoundError:
+                # The entry was removed after it was read.
+                return messages
+            if key not in entries:
+                # The entry was written by another process.
+                entries[key] = size
+                self.size += size
+            entries.move_to_end(key)
+        return messages
+
+    def put(self, key: str, messages: List[TTSChunk]) -> None:
+        with self.lock:
+            entries = self.__load_entries()
+
+        header: List[Dict[str, Any]] = []
+        audio: List[Union[bytes, memoryview]] = []
+        for message in messages:
+            if message["type"] == "audio":
+                header.append({"type": "audio", "size": len(message["data"])})
+                audio.append(message["data"])
+            else:
+                header.append(dict(message))
+        data = json.dumps(header).encode("utf-8") + b"\n" + b"".join(audio)
+        if len(data) > self.max_size:
+            return
+
+        # Write the entry to a temporary file first, so that it is either
+        # complete or missing, even if several processes write it at once.
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, self.__path(key))
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        with self.lock:
+            self.size += len(data) - entries.pop(key, 0)
+            entries[key] = len(data)
+            self.__evict()
+
+    async def get_async(self, key: str) -> Optional[List[TTSChunk]]:
+        return await asyncio.get_running_loop().run_in_executor(None, self.get, key)
+
+    async def put_async(self, key: str, messages: List[TTSChunk]) -> None:
+        await asyncio.get_running_loop().run_in_executor(None, self.put, key, messages)
+
+
+class MemoryCache(Cache):
+    """
+    A cache that keeps the most recently used turns in memory, which suits
+    short phrases that are spoken over and over again.
+
+    Once the entries take up more than `max_size` bytes of audio and text, the
+    least recently used ones are dropped.
+    """
+
+    def __init__(self, max_size: int = 64 * 1024 * 1024) -> None:
+        super().__init__()
+
+        # Validate the max_size parameter.
+        if not isinstance(max_size, int):
+            raise TypeError("max_size must be int")
+        if max_size <= 0:
+            raise ValueError("max_size must be greater than 0")
+        self.max_size = max_size
+
+        # The entries and their sizes from the least to the most recently used.
+        self.entries: "OrderedDict[str, Tuple[List[TTSChunk], int]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[List[TTSChunk]]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return [message.copy() for message in entry[0]]
+
+    def put(self, key: str, messages: List[TTSChunk]) -> None:
+        size = sum(
+            len(message["data"]) if message["type"] == "audio" else len(message["text"])
+            for message in messages
+        )
+        if size > self.max_size:
+            return
+
+        previous = self.entries.pop(key, None)
+        if previous is not None:
+            self.size -= previous[1]
+        self.entries[key] = (messages, size)
+        self.size += size
+
+        # Drop the least recently used entries until the cache fits.
+        while self.size > self.max_size:
+            _, (_, dropped_size) = self.entries.popitem(last=False)
+            self.size -= dropped_size
@@ -0,0 +1,135 @@
+"""Client module is used to synthesize speech from synchronous code, such as
+the threads of a WSGI server, without paying for an event loop and a new
+connection on every call."""
+
+import io
+from typing import Any, AsyncGenerator, Generator, Optional, Type, Union
+
+import aiohttp
+
+from .cache import Cache
+from .communicate import Communicate
+from .connection import CommunicatePool
+from .constants import DEFAULT_VOICE, SYNC_QUEUED_CHUNKS
+from .runner import LoopRunner
+from .transport import Transport
+from .typing import TTSChunk
+
+
+class SyncClient:
+    """
+    A synchronous client that can be shared by any number of threads.
+
+    All calls run on a single event loop in a background thread owned by the
+    client, over a CommunicatePool of warm connections, so concurrent calls
+    from different threads synthesize concurrently while sharing the
+    connections. The client holds no state that is touched outside of its
+    loop, so it does not rely on the GIL to be thread-safe.
+
+    The client should be closed once it is no longer needed, either with
+    close() or by using it as a context manager.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        max_connections: int = 4,
+        *,
+        connector: Optional[aiohttp.BaseConnector] = None,
+        proxy: Optional[str] = None,
+        connect_timeout: Optional[int] = 10,
+        receive_timeout: Optional[int] = 60,
+        max_idle_time: float = 60.0,
+        transport: Union[str, Type[Transport]] = "aiohttp",
+        cache: Optional[Cache] = None,
+    ):
+        self.pool = CommunicatePool(
+            max_connections,
+            connector=connector,
+            proxy=proxy,
+            connect_timeout=connect_timeout,
+            receive_timeout=receive_timeout,
+            max_idle_time=max_idle_time,
+            transport=transport,
+        )
+
+        # Validate the cache parameter.
+        if cache is not None and not isinstance(cache, Cache):
+            raise TypeError("cache must be Cache")
+        self.cache = cache
+
+        self.runner = LoopRunner()
+
+    def __communicate(self, text: str, voice: str, **kwargs: Any) -> Communicate:
+        """Returns a Communicate instance that synthesizes over the pool."""
+        return Communicate(text, voice, pool=self.pool, cache=self.cache, **kwargs)
+
+    def __check_open(self) -> None:
+        """Raises if the client is closed, which is only checked on its loop."""
+        if self.pool.closed:
+            raise RuntimeError("SyncClient is closed.")
+
+    def synthesize(self, text: str, voice: str = DEFAULT_VOICE, **kwargs: Any) -> bytes:
+        """
+        Synthesizes a text and returns its audio.
+
+        Args:
+            text (str): The text to synthesize.
+            voice (str): The voice to use.
+            **kwargs: The other parameters of Communicate, such as rate or
+                output_format.
+
+        Returns:
+            bytes: The audio of the text.
+        """
+        communicate = self.__communicate(text, voice, **kwargs)
+
+        async def synthesize() -> bytes:
+            self.__check_open()
+            audio = io.BytesIO()
+            await communicate.stream_into(audio)
+            return audio.getvalue()
+
+        return self.runner.run(synthesize())
+
+    def stream(
+        self, text: str, voice: str = DEFAULT_VOICE, **kwargs: Any
+    ) -> Generator[TTSChunk, None, None]:
+        """
+        Streams the audio and metadata of a text, like Communicate.stream_sync.
+
+        Args:
+            text (str): The text to synthesize.
+            voice (str): The voice to use.
+            **kwargs: The other parameters of Communicate, such as rate or
+                boundary.
+
+        Yields:
+            TTSChunk: The audio and metadata of the text.
+        """
+        communicate = self.__communicate(text, voice, **kwargs)
+
+        async def stream() -> AsyncGenerator[TTSChunk, None]:
+            self.__check_open()
+            messages = communicate.stream()
+            try:
+                async for message in messages:
+                    yield message
+            finally:
+                await messages.aclose()
+
+        yield from self.runner.iterate(stream(), SYNC_QUEUED_CHUNKS)
+
+    def close(self) -> None:
+        """
+        Cancels the calls that are still running, which raise a RuntimeError
+        in their threads, closes the connections of the client and stops its
+        event loop.
+        """
+        self.runner.close(self.pool.close)
+
+    def __enter__(self) -> "SyncClient":
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
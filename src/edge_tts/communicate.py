@@ -2,311 +2,62 @@
 end-users. The other classes and functions are for internal use only."""
 
 import asyncio
-import concurrent.futures
-import json
-import ssl
-import time
-import uuid
-from contextlib import nullcontext
-from io import TextIOWrapper
-from queue import Queue
+import mmap
+import os
+from collections import deque
 from typing import (
+    Any,
     AsyncGenerator,
-    ContextManager,
+    AsyncIterable,
+    Callable,
+    Deque,
     Dict,
     Generator,
     List,
+    Mapping,
     Optional,
     Tuple,
     Union,
 )
-from xml.sax.saxutils import escape, unescape
 
 import aiohttp
-import certifi
 from typing_extensions import Literal
 
-from .constants import DEFAULT_VOICE, SEC_MS_GEC_VERSION, WSS_HEADERS, WSS_URL
+from .audio import duration_counter
+from .batch import K, pack_items, split_batch, terminate_sentence
+from .cache import Cache, cache_key
+from .connection import CommunicatePool
+from .constants import (
+    DEFAULT_OUTPUT_FORMAT,
+    DEFAULT_VOICE,
+    OUTPUT_FORMATS,
+    SYNC_QUEUED_CHUNKS,
+)
 from .data_classes import TTSConfig
-from .drm import DRM
-from .exceptions import (
-    NoAudioReceived,
-    UnexpectedResponse,
-    UnknownResponse,
-    WebSocketError,
+from .exceptions import WebSocketError
+from .flight import Flight
+from .protocol import (  # pylint: disable=unused-import
+    TurnProtocol,
+    connect_id,
+    date_to_string,
+    get_headers_and_data,
+    mkssml,
+    parse_binary_message,
+    parse_text_message,
+    speech_config_data,
+    ssml_headers_plus_data,
 )
-from .typing import CommunicateState, TTSChunk
-
-
-def get_headers_and_data(
-    data: bytes, header_length: int
-) -> Tuple[Dict[bytes, bytes], bytes]:
-    """
-    Returns the headers and data from the given data.
-
-    Args:
-        data (bytes): The data to be parsed.
-        header_length (int): The length of the header.
-
-    Returns:
-        tuple: The headers and data to be used in the request.
-    """
-    if not isinstance(data, bytes):
-        raise TypeError("data must be bytes")
-
-    headers = {}
-    for line in data[:header_length].split(b"\r\n"):
-        key, value = line.split(b":", 1)
-        headers[key] = value
-
-    return headers, data[header_length + 2 :]
-
-
-def remove_incompatible_characters(string: Union[str, bytes]) -> str:
-    """
-    The service does not support a couple character ranges.
-    Most important being the vertical tab character which is
-    commonly present in OCR-ed PDFs. Not doing this will
-    result in an error from the service.
-
-    Args:
-        string (str or bytes): The string to be cleaned.
-
-    Returns:
-        str: The cleaned string.
-    """
-    if isinstance(string, bytes):
-        string = string.decode("utf-8")
-    if not isinstance(string, str):
-        raise TypeError("string must be str or bytes")
-
-    chars: List[str] = list(string)
-
-    for idx, char in enumerate(chars):
-        code: int = ord(char)
-        if (0 <= code <= 8) or (11 <= code <= 12) or (14 <= code <= 31):
-            chars[idx] = " "
-
-    return "".join(chars)
-
-
-def connect_id() -> str:
-    """
-    Returns a UUID without dashes.
-
-    Returns:
-        str: A UUID without dashes.
-    """
-    return str(uuid.uuid4()).replace("-", "")
-
-
-def _find_last_newline_or_space_within_limit(text: bytes, limit: int) -> int:
-    """
-    Finds the index of the rightmost preferred split character (newline or space)
-    within the initial `limit` bytes of the text.
-
-    This helps find a natural word or sentence boundary for splitting, prioritizing
-    newlines over spaces.
-
-    Args:
-        text (bytes): The byte string to search within.
-        limit (int): The maximum index (exclusive) to search up to.
-
-    Returns:
-        int: The index of the last found newline or space within the limit,
-             or -1 if neither is found in that range.
-    """
-    # Prioritize finding a newline character
-    split_at = text.rfind(b"\n", 0, limit)
-    # If no newline is found, search for a space
-    if split_at < 0:
-        split_at = text.rfind(b" ", 0, limit)
-    return split_at
-
-
-def _find_safe_utf8_split_point(text_segment: bytes) -> int:
-    """
-    Finds the rightmost possible byte index such that the
-    segment `text_segment[:index]` is a valid UTF-8 sequence.
-
-    This prevents splitting in the middle of a multi-byte UTF-8 character.
-
-    Args:
-        text_segment (bytes): The byte segment being considered for splitting.
-
-    Returns:
-        int: The index of the safe split point. Returns 0 if no valid split
-             point is found (e.g., if the first byte is part of a multi-byte
-             sequence longer than the limit allows).
-    """
-    split_at = len(text_segment)
-    while split_at > 0:
-        try:
-            text_segment[:split_at].decode("utf-8")
-            # Found the largest valid UTF-8 sequence
-            return split_at
-        except UnicodeDecodeError:
-            # The byte at split_at-1 is part of an incomplete multi-byte char, try earlier
-            split_at -= 1
-
-    return split_at
-
-
-def _adjust_split_point_for_xml_entity(text: bytes, split_at: int) -> int:
-    """
-    Adjusts a proposed split point backward to prevent splitting inside an XML entity.
-
-    For example, if `text` is `b"this &amp; that"` and `split_at` falls between
-    `&` and `;`, this function moves `split_at` to the index before `&`.
-
-    Args:
-        text (bytes): The text segment being considered.
-        split_at (int): The proposed split point index, determined by whitespace
-                        or UTF-8 safety.
-
-    Returns:
-        int: The adjusted split point index. It will be moved to the '&'
-             if an unterminated entity is detected right before the original `split_at`.
-             Otherwise, the original `split_at` is returned.
-    """
-    while split_at > 0 and b"&" in text[:split_at]:
-        ampersand_index = text.rindex(b"&", 0, split_at)
-        # Check if a semicolon exists between the ampersand and the split point
-        if text.find(b";", ampersand_index, split_at) != -1:
-            # Found a terminated entity (like &amp;), safe to break at original split_at
-            break
-
-        # Ampersand is not terminated before split_at, move split_at to it
-        split_at = ampersand_index
-
-    return split_at
-
-
-def split_text_by_byte_length(
-    text: Union[str, bytes], byte_length: int
-) -> Generator[bytes, None, None]:
-    """
-    Splits text into chunks, each not exceeding a maximum byte length.
-
-    This function prioritizes splitting at natural boundaries (newlines, spaces)
-    while ensuring that:
-    1. No chunk exceeds `byte_length` bytes.
-    2. Chunks do not end with an incomplete UTF-8 multi-byte character.
-    3. Chunks do not split XML entities (like `&amp;`) in the middle.
-
-    Args:
-        text (str or bytes): The input text. If str, it's encoded to UTF-8.
-        byte_length (int): The maximum allowed byte length for any yielded chunk.
-                           Must be positive.
-
-    Yields:
-        bytes: Text chunks (UTF-8 encoded, stripped of leading/trailing whitespace)
-               that conform to the byte length and integrity constraints.
-
-    Raises:
-        TypeError: If `text` is not str or bytes.
-        ValueError: If `byte_length` is not positive, or if a split point
-                    cannot be determined (e.g., due to extremely small byte_length
-                    relative to character/entity sizes).
-    """
-    if isinstance(text, str):
-        text = text.encode("utf-8")
-    if not isinstance(text, bytes):
-        raise TypeError("text must be str or bytes")
-
-    if byte_length <= 0:
-        raise ValueError("byte_length must be greater than 0")
-
-    while len(text) > byte_length:
-        # Find the initial split point based on whitespace or UTF-8 boundary
-        split_at = _find_last_newline_or_space_within_limit(text, byte_length)
-
-        if split_at < 0:
-            ## No newline or space found, so we need to find a safe UTF-8 split point
-            split_at = _find_safe_utf8_split_point(text)
-
-        # Adjust the split point to avoid cutting in the middle of an xml entity, such as '&amp;'
-        split_at = _adjust_split_point_for_xml_entity(text, split_at)
-
-        if split_at < 0:
-            # This should not happen if byte_length is reasonable,
-            # but guards against edge cases.
-            raise ValueError(
-                "Maximum byte length is too small or "
-                "invalid text structure near '&' or invalid UTF-8"
-            )
-
-        # Yield the chunk
-        chunk = text[:split_at].strip()
-        if chunk:
-            yield chunk
-
-        # Prepare for the next iteration
-        # If split_at became 0 after adjustment, advance by 1 to avoid infinite loop
-        text = text[split_at if split_at > 0 else 1 :]
-
-    # Yield the remaining part
-    remaining_chunk = text.strip()
-    if remaining_chunk:
-        yield remaining_chunk
-
-
-def mkssml(tc: TTSConfig, escaped_text: Union[str, bytes]) -> str:
-    """
-    Creates a SSML string from the given parameters.
-
-    Args:
-        tc (TTSConfig): The TTS configuration.
-        escaped_text (str or bytes): The escaped text. If bytes, it must be UTF-8 encoded.
-
-    Returns:
-        str: The SSML string.
-    """
-    if isinstance(escaped_text, bytes):
-        escaped_text = escaped_text.decode("utf-8")
-
-    return (
-        "<speak version='1.0' xmlns='http://www.w3.org/2001/10/synthesis' xml:lang='en-US'>"
-        f"<voice name='{tc.voice}'>"
-        f"<prosody pitch='{tc.pitch}' rate='{tc.rate}' volume='{tc.volume}'>"
-        f"{escaped_text}"
-        "</prosody>"
-        "</voice>"
-        "</speak>"
-    )
-
-
-def date_to_string() -> str:
-    """
-    Return Javascript-style date string.
-
-    Returns:
-        str: Javascript-style date string.
-    """
-    # %Z is not what we want, but it's the only way to get the timezone
-    # without having to use a library. We'll just use UTC and hope for the best.
-    # For example, right now %Z would return EEST when we need it to return
-    # Eastern European Summer Time.
-    return time.strftime(
-        "%a %b %d %Y %H:%M:%S GMT+0000 (Coordinated Universal Time)", time.gmtime()
-    )
-
-
-def ssml_headers_plus_data(request_id: str, timestamp: str, ssml: str) -> str:
-    """
-    Returns the headers and data to be used in the request.
-
-    Returns:
-        str: The headers and data to be used in the request.
-    """
-
-    return (
-        f"X-RequestId:{request_id}\r\n"
-        "Content-Type:application/ssml+xml\r\n"
-        f"X-Timestamp:{timestamp}Z\r\n"  # This is not a mistake, Microsoft Edge bug.
-        "Path:ssml\r\n\r\n"
-        f"{ssml}"
-    )
+from .runner import RUNNER
+from .text import (  # pylint: disable=unused-import
+    prepare_text,
+    remove_incompatible_characters,
+    split_async_text_source,
+    split_text_by_byte_length,
+    split_text_source,
+)
+from .transport import WebSocket
+from .typing import AudioWriter, BatchResult, CommunicateState, TextSource, TTSChunk
+from .writer import save_stream, write_stream
 
 
 class Communicate:
@@ -314,33 +65,52 @@ class Communicate:
     Communicate with the service.
     """
 
-    # pylint: disable=too-many-arguments
+    # pylint: disable=too-many-instance-attributes
+
+    # pylint: disable=too-many-arguments,too-many-statements
     def __init__(
         self,
-        text: str,
+        text: TextSource,
         voice: str = DEFAULT_VOICE,
         *,
         rate: str = "+0%",
         volume: str = "+0%",
         pitch: str = "+0Hz",
-        boundary: Literal["WordBoundary", "SentenceBoundary"] = "SentenceBoundary",
+        boundary: Optional[
+            Literal["WordBoundary", "SentenceBoundary"]
+        ] = "SentenceBoundary",
         connector: Optional[aiohttp.BaseConnector] = None,
         proxy: Optional[str] = None,
         connect_timeout: Optional[int] = 10,
         receive_timeout: Optional[int] = 60,
+        pool: Optional[CommunicatePool] = None,
+        concurrency: int = 1,
+        split_sentences: bool = False,
+        cache: Optional[Cache] = None,
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
+        audio_views: bool = False,
+        coalesce_bytes: Optional[int] = None,
+        coalesce_ms: Optional[int] = None,
     ):
         # Validate TTS settings and store the TTSConfig object.
-        self.tts_config = TTSConfig(voice, rate, volume, pitch, boundary)
-
-        # Validate the text parameter.
-        if not isinstance(text, str):
-            raise TypeError("text must be str")
-
-        # Split the text into multiple strings and store them.
-        self.texts = split_text_by_byte_length(
-            escape(remove_incompatible_characters(text)),
-            4096,
-        )
+        self.tts_config = TTSConfig(voice, rate, volume, pitch, boundary, output_format)
+
+        # Validate the split_sentences parameter.
+        if not isinstance(split_sentences, bool):
+            raise TypeError("split_sentences must be bool")
+
+        # Validate the text parameter and split it lazily into multiple strings,
+        # so that the text source is only read as far as it is being synthesized.
+        self.texts: Union[Generator[bytes, None, None], AsyncGenerator[bytes, None]]
+        if isinstance(text, AsyncIterable):
+            self.texts = split_async_text_source(text, 4096, split_sentences)
+        elif isinstance(text, (str, os.PathLike, mmap.mmap)) or hasattr(text, "read"):
+            self.texts = split_text_source(text, 4096, split_sentences)
+        else:
+            raise TypeError(
+                "text must be str, os.PathLike, mmap.mmap, a file object "
+                "or an async iterable of str"
+            )
 
         # Validate the proxy parameter.
         if proxy is not None and not isinstance(proxy, str):
@@ -352,18 +122,61 @@ class Communicate:
             raise TypeError("connect_timeout must be int")
         if not isinstance(receive_timeout, int):
             raise TypeError("receive_timeout must be int")
-        self.session_timeout = aiohttp.ClientTimeout(
-            total=None,
-            connect=None,
-            sock_connect=connect_timeout,
-            sock_read=receive_timeout,
-        )
+        self.connect_timeout: int = connect_timeout
+        self.receive_timeout: int = receive_timeout
 
         # Validate the connector parameter.
         if connector is not None and not isinstance(connector, aiohttp.BaseConnector):
             raise TypeError("connector must be aiohttp.BaseConnector")
         self.connector: Optional[aiohttp.BaseConnector] = connector
 
+        # Validate the pool parameter. Connection settings belong to the pool
+        # when one is used, so they cannot also be given here. The timeouts
+        # above only apply to the private pool used without one.
+        if pool is not None and not isinstance(pool, CommunicatePool):
+            raise TypeError("pool must be CommunicatePool")
+        if pool is not None and (connector is not None or proxy is not None):
+            raise ValueError("connector and proxy must be set on the pool instead")
+        self.pool: Optional[CommunicatePool] = pool
+
+        # Without a shared pool, the stream uses a private pool, which is
+        # created by prepare() or else once streaming starts.
+        self.private_pool: Optional[CommunicatePool] = None
+
+        # Validate the concurrency parameter.
+        if not isinstance(concurrency, int):
+            raise TypeError("concurrency must be int")
+        if concurrency <= 0:
+            raise ValueError("concurrency must be greater than 0")
+        self.concurrency = concurrency
+
+        # Validate the cache parameter.
+        if cache is not None and not isinstance(cache, Cache):
+            raise TypeError("cache must be Cache")
+        self.cache: Optional[Cache] = cache
+
+        # Validate the audio_views parameter. With audio views, the audio data
+        # is a read-only memoryview of the message it was received in, which
+        # is not copied, instead of bytes of its own.
+        if not isinstance(audio_views, bool):
+            raise TypeError("audio_views must be bool")
+        self.audio_views = audio_views
+
+        # Validate the coalesce parameters. Audio is yielded in blocks of at
+        # least coalesce_bytes bytes or coalesce_ms milliseconds of audio, which
+        # only end early before boundaries and at the end of every turn.
+        if coalesce_bytes is not None and not isinstance(coalesce_bytes, int):
+            raise TypeError("coalesce_bytes must be int")
+        if coalesce_bytes is not None and coalesce_bytes <= 0:
+            raise ValueError("coalesce_bytes must be greater than 0")
+        if coalesce_ms is not None and not isinstance(coalesce_ms, int):
+            raise TypeError("coalesce_ms must be int")
+        if coalesce_ms is not None and coalesce_ms <= 0:
+            raise ValueError("coalesce_ms must be greater than 0")
+        self.coalesce_bytes = coalesce_bytes
+        self.coalesce_ms = coalesce_ms
+        self.coalesce = coalesce_bytes is not None or coalesce_ms is not None
+
         # Store current state of TTS.
         self.state: CommunicateState = {
             "partial_text": b"",
@@ -372,175 +185,395 @@ class Communicate:
             "stream_was_called": False,
         }
 
-    def __parse_metadata(self, data: bytes) -> TTSChunk:
-        for meta_obj in json.loads(data)["Metadata"]:
-            meta_type = meta_obj["Type"]
-            if meta_type in ("WordBoundary", "SentenceBoundary"):
-                current_offset = (
-                    meta_obj["Data"]["Offset"] + self.state["offset_compensation"]
-                )
-                current_duration = meta_obj["Data"]["Duration"]
-                return {
-                    "type": meta_type,
-                    "offset": current_offset,
-                    "duration": current_duration,
-                    "text": unescape(meta_obj["Data"]["text"]["Text"]),
-                }
-            if meta_type in ("SessionEnd",):
+        # The seconds of connect latency the turns of the stream did not have
+        # to wait for, because their connections were already open.
+        self.latency_saved = 0.0
+
+    async def __stream_turn(
+        self, websocket: WebSocket, partial_text: bytes
+    ) -> AsyncGenerator[TTSChunk, None]:
+        """
+        Sends the SSML request for the given partial text and streams the
+        response until the service signals the end of the turn. Offsets are
+        relative to the start of the turn.
+
+        Raises:
+            WebSocketError: If the connection is closed before turn.end.
+        """
+        turn = TurnProtocol(self.tts_config, partial_text)
+        await websocket.send(turn.request())
+        while not turn.ended:
+            received = await websocket.receive()
+            if received is None:
+                raise WebSocketError("The connection was closed before the turn ended.")
+
+            message = turn.receive(received)
+            if message is not None:
+                yield message
+
+    async def __synthesize(
+        self, pool: CommunicatePool, partial_text: bytes
+    ) -> AsyncGenerator[TTSChunk, None]:
+        """
+        Synthesizes a single partial text as one turn, or replays the turn
+        from the cache if it was synthesized with the same settings before.
+        A turn that is already being synthesized over the pool is joined
+        instead of being requested again.
+        """
+        key = cache_key(
+            speech_config_data(self.tts_config), mkssml(self.tts_config, partial_text)
+        )
+
+        cache = self.cache
+        flight = pool.flights.get(key)
+        pending: Optional[asyncio.Event] = None
+        while flight is None and cache is not None:
+            waiting = cache.pending.get(key)
+            if waiting is not None:
+                # Wait for the same turn if it is being synthesized over
+                # another pool, it will be a hit once it is stored.
+                await waiting.wait()
+            else:
+                messages = await cache.get_async(key)
+                if messages is not None:
+                    for message in messages:
+                        yield message
+                    return
+
+                if key not in cache.pending and key not in pool.flights:
+                    # The miss is registered before anything else is awaited,
+                    # so that identical turns wait for this one instead of
+                    # missing as well.
+                    pending = cache.pending[key] = asyncio.Event()
+                    break
+            flight = pool.flights.get(key)
+
+        if flight is None:
+
+            def close() -> None:
+                pool.flights.pop(key)
+                if cache is not None and pending is not None:
+                    # The turn was stored or failed, either way it is no
+                    # longer pending.
+                    if cache.pending.get(key) is pending:
+                        del cache.pending[key]
+                    pending.set()
+
+            flight = Flight(self.__fly(pool, key, partial_text), close)
+            pool.flights[key] = flight
+
+        subscription = flight.subscribe()
+        try:
+            async for message in subscription:
+                yield message
+        finally:
+            await subscription.aclose()
+
+    async def __fly(
+        self, pool: CommunicatePool, key: str, partial_text: bytes
+    ) -> AsyncGenerator[TTSChunk, None]:
+        """
+        Synthesizes a turn on behalf of a flight, and stores it in the cache
+        once it is complete.
+
+        The audio is yielded as views of the received messages, which are
+        immutable and can be shared by every stream of the flight, while the
+        cache is given copies so that it does not keep the messages alive.
+        """
+        if self.cache is None:
+            async for message in self.__synthesize_uncached(pool, partial_text):
+                yield message
+            return
+
+        messages: List[TTSChunk] = []
+        async for message in self.__synthesize_uncached(pool, partial_text):
+            if message["type"] == "audio":
+                messages.append({"type": "audio", "data": bytes(message["data"])})
+            else:
+                messages.append(message.copy())
+            yield message
+        await self.cache.put_async(key, messages)
+
+    async def __synthesize_uncached(
+        self, pool: CommunicatePool, partial_text: bytes
+    ) -> AsyncGenerator[TTSChunk, None]:
+        """
+        Synthesizes a single partial text as one turn over a pooled connection,
+        which is only replaced if the service closed it between turns.
+        """
+        reconnected = False
+        while True:
+            message_was_yielded = False
+            try:
+                async with pool.connection(self.tts_config) as connection:
+                    if connection.reused:
+                        self.latency_saved += connection.connect_time
+                    async for message in self.__stream_turn(
+                        connection.websocket, partial_text
+                    ):
+                        message_was_yielded = True
+                        yield message
+            except (
+                aiohttp.ClientConnectionError,
+                ConnectionResetError,
+                WebSocketError,
+            ):
+                # Only a turn that has not produced anything yet can be
+                # replayed on a new connection without duplicating output.
+                if message_was_yielded or reconnected:
+                    raise
+                reconnected = True
                 continue
-            raise UnknownResponse(f"Unknown metadata type: {meta_type}")
-        raise UnexpectedResponse("No WordBoundary metadata found")
-
-    async def __stream(self) -> AsyncGenerator[TTSChunk, None]:
-        async def send_command_request() -> None:
-            """Sends the command request to the service."""
-            word_boundary = self.tts_config.boundary == "WordBoundary"
-            wd = "true" if word_boundary else "false"
-            sq = "true" if not word_boundary else "false"
-            await websocket.send_str(
-                f"X-Timestamp:{date_to_string()}\r\n"
-                "Content-Type:application/json; charset=utf-8\r\n"
-                "Path:speech.config\r\n\r\n"
-                '{"context":{"synthesis":{"audio":{"metadataoptions":{'
-                f'"sentenceBoundaryEnabled":"{sq}","wordBoundaryEnabled":"{wd}"'
-                "},"
-                '"outputFormat":"audio-24khz-48kbitrate-mono-mp3"'
-                "}}}}\r\n"
-            )
+            return
+
+    async def __prefetch(
+        self,
+        pool: CommunicatePool,
+        partial_text: bytes,
+        queue: "asyncio.Queue[Optional[TTSChunk]]",
+    ) -> None:
+        """Synthesizes a partial text ahead of time into the given queue."""
+        try:
+            async for message in self.__synthesize(pool, partial_text):
+                queue.put_nowait(message)
+        finally:
+            # None marks the end of the turn, even if it failed.
+            queue.put_nowait(None)
+
+    async def __turns(
+        self, pool: CommunicatePool
+    ) -> AsyncGenerator[AsyncGenerator[TTSChunk, None], None]:
+        """
+        Yields the turns of the stream in order. With a concurrency greater
+        than one, up to that many turns are synthesized at the same time and
+        the messages of turns that are not being yielded yet are buffered.
+        """
+        texts = self.__texts()
+        try:
+            if self.concurrency == 1:
+                async for self.state["partial_text"] in texts:
+                    yield self.__synthesize(pool, self.state["partial_text"])
+            else:
+                async for turn in self.__prefetched_turns(pool, texts):
+                    yield turn
+        finally:
+            await texts.aclose()
+
+    async def __texts(self) -> AsyncGenerator[bytes, None]:
+        """Yields the partial texts, whether they are split lazily or not."""
+        texts = self.texts
+        if isinstance(texts, Generator):
+            try:
+                for partial_text in texts:
+                    yield partial_text
+            finally:
+                texts.close()
+        else:
+            try:
+                async for partial_text in texts:
+                    yield partial_text
+            finally:
+                await texts.aclose()
+
+    async def __prefetched_turns(
+        self, pool: CommunicatePool, texts: AsyncGenerator[bytes, None]
+    ) -> AsyncGenerator[AsyncGenerator[TTSChunk, None], None]:
+        """Yields the turns in order while prefetching the ones after them."""
+
+        async def drain(
+            task: "asyncio.Task[None]", queue: "asyncio.Queue[Optional[TTSChunk]]"
+        ) -> AsyncGenerator[TTSChunk, None]:
+            while True:
+                message = await queue.get()
+                if message is None:
+                    break
+                yield message
+            # Raise the exception of the turn, if any.
+            await task
+
+        # Turns are started as soon as their text is available, and while
+        # the turns before them are being yielded, so that text which is still
+        # being generated is synthesized without waiting for the window to fill.
+        window: Deque[
+            Tuple[bytes, "asyncio.Task[None]", "asyncio.Queue[Optional[TTSChunk]]"]
+        ] = deque()
+        slots = asyncio.Semaphore(self.concurrency)
+        started: "asyncio.Queue[bool]" = asyncio.Queue()
+
+        async def start_turns() -> None:
+            try:
+                async for partial_text in texts:
+                    await slots.acquire()
+                    queue: "asyncio.Queue[Optional[TTSChunk]]" = asyncio.Queue()
+                    task = asyncio.ensure_future(
+                        self.__prefetch(pool, partial_text, queue)
+                    )
+                    window.append((partial_text, task, queue))
+                    started.put_nowait(True)
+            finally:
+                # False marks the end of the texts, even if reading them failed.
+                started.put_nowait(False)
 
-        async def send_ssml_request() -> None:
-            """Sends the SSML request to the service."""
-            await websocket.send_str(
-                ssml_headers_plus_data(
-                    connect_id(),
-                    date_to_string(),
-                    mkssml(
-                        self.tts_config,
-                        self.state["partial_text"],
-                    ),
-                )
+        feeder = asyncio.ensure_future(start_turns())
+        try:
+            while await started.get():
+                self.state["partial_text"], task, queue = window[0]
+                yield drain(task, queue)
+                window.popleft()
+                slots.release()
+
+            # Raise the exception of the text source, if any.
+            await feeder
+        finally:
+            feeder.cancel()
+            await asyncio.gather(feeder, return_exceptions=True)
+            for _, task, _ in window:
+                task.cancel()
+            await asyncio.gather(
+                *(task for _, task, _ in window), return_exceptions=True
             )
 
-        # audio_was_received indicates whether we have received audio data
-        # from the websocket. This is so we can raise an exception if we
-        # don't receive any audio data.
-        audio_was_received = False
-
-        # Create a new connection to the service.
-        ssl_ctx = ssl.create_default_context(cafile=certifi.where())
-        async with aiohttp.ClientSession(
-            connector=self.connector,
-            trust_env=True,
-            timeout=self.session_timeout,
-        ) as session, session.ws_connect(
-            f"{WSS_URL}&ConnectionId={connect_id()}"
-            f"&Sec-MS-GEC={DRM.generate_sec_ms_gec()}"
-            f"&Sec-MS-GEC-Version={SEC_MS_GEC_VERSION}",
-            compress=15,
-            proxy=self.proxy,
-            headers=WSS_HEADERS,
-            ssl=ssl_ctx,
-        ) as websocket:
-            await send_command_request()
-
-            await send_ssml_request()
-
-            async for received in websocket:
-                if received.type == aiohttp.WSMsgType.TEXT:
-                    encoded_data: bytes = received.data.encode("utf-8")
-                    parameters, data = get_headers_and_data(
-                        encoded_data, encoded_data.find(b"\r\n\r\n")
-                    )
+    def __block_is_full(self, length: int, duration: int) -> bool:
+        """Checks whether a block of coalesced audio can be yielded."""
+        return (self.coalesce_bytes is not None and length >= self.coalesce_bytes) or (
+            self.coalesce_ms is not None and duration >= self.coalesce_ms * 10_000
+        )
 
-                    path = parameters.get(b"Path", None)
-                    if path == b"audio.metadata":
-                        # Parse the metadata and yield it.
-                        parsed_metadata = self.__parse_metadata(data)
-                        yield parsed_metadata
-
-                        # Update the last duration offset for use by the next SSML request.
-                        self.state["last_duration_offset"] = (
-                            parsed_metadata["offset"] + parsed_metadata["duration"]
-                        )
-                    elif path == b"turn.end":
-                        # Update the offset compensation for the next SSML request.
-                        self.state["offset_compensation"] = self.state[
-                            "last_duration_offset"
-                        ]
-
-                        # Use average padding typically added by the service
-                        # to the end of the audio data. This seems to work pretty
-                        # well for now, but we might ultimately need to use a
-                        # more sophisticated method like using ffmpeg to get
-                        # the actual duration of the audio data.
-                        self.state["offset_compensation"] += 8_750_000
-
-                        # Exit the loop so we can send the next SSML request.
-                        break
-                    elif path not in (b"response", b"turn.start"):
-                        raise UnknownResponse("Unknown path received")
-                elif received.type == aiohttp.WSMsgType.BINARY:
-                    # Message is too short to contain header length.
-                    if len(received.data) < 2:
-                        raise UnexpectedResponse(
-                            "We received a binary message, but it is missing the header length."
-                        )
-
-                    # The first two bytes of the binary message contain the header length.
-                    header_length = int.from_bytes(received.data[:2], "big")
-                    if header_length > len(received.data):
-                        raise UnexpectedResponse(
-                            "The header length is greater than the length of the data."
-                        )
-
-                    # Parse the headers and data from the binary message.
-                    parameters, data = get_headers_and_data(
-                        received.data, header_length
-                    )
+    @staticmethod
+    def __join_block(block: List[Union[bytes, memoryview]], views: bool) -> TTSChunk:
+        """
+        Joins the coalesced audio into a single chunk and empties the block.
+        The audio is copied once, straight from the received messages.
+        """
+        data = b"".join(block)
+        block.clear()
+        return {"type": "audio", "data": memoryview(data) if views else data}
 
-                    # Check if the path is audio.
-                    if parameters.get(b"Path") != b"audio":
-                        raise UnexpectedResponse(
-                            "Received binary message, but the path is not audio."
-                        )
-
-                    # At termination of the stream, the service sends a binary message
-                    # with no Content-Type; this is expected. What is not expected is for
-                    # an MPEG audio stream to be sent with no data.
-                    content_type = parameters.get(b"Content-Type", None)
-                    if content_type not in [b"audio/mpeg", None]:
-                        raise UnexpectedResponse(
-                            "Received binary message, but with an unexpected Content-Type."
-                        )
-
-                    # We only allow no Content-Type if there is no data.
-                    if content_type is None:
-                        if len(data) == 0:
-                            continue
-
-                        # If the data is not empty, then we need to raise an exception.
-                        raise UnexpectedResponse(
-                            "Received binary message with no Content-Type, but with data."
-                        )
-
-                    # If the data is empty now, then we need to raise an exception.
-                    if len(data) == 0:
-                        raise UnexpectedResponse(
-                            "Received binary message, but it is missing the audio data."
-                        )
-
-                    # Yield the audio data.
-                    audio_was_received = True
-                    yield {"type": "audio", "data": data}
-                elif received.type == aiohttp.WSMsgType.ERROR:
-                    raise WebSocketError(
-                        received.data if received.data else "Unknown error"
+    async def __stream(
+        self, pool: CommunicatePool, views: bool
+    ) -> AsyncGenerator[TTSChunk, None]:
+        # The generators are closed explicitly so that connections are handed
+        # back to the pool, and prefetching stops, as soon as streaming stops.
+        turns = self.__turns(pool)
+
+        # The coalesced audio that was not yielded yet, its length, and the
+        # duration of the turn at which it starts.
+        block: List[Union[bytes, memoryview]] = []
+        block_length = 0
+        block_start = 0
+        try:
+            async for turn in turns:
+                # The audio of the turn is measured so that the next turn can be
+                # placed right after it on the timeline of the whole stream.
+                counter = duration_counter(self.tts_config.output_format)
+                try:
+                    async for message in turn:
+                        if message["type"] == "audio":
+                            counter.feed(message["data"])
+                            if self.coalesce:
+                                block.append(message["data"])
+                                block_length += len(message["data"])
+                                if self.__block_is_full(
+                                    block_length, counter.duration - block_start
+                                ):
+                                    yield self.__join_block(block, views)
+                                    block_length = 0
+                                    block_start = counter.duration
+                                continue
+                            # The audio of a flight is shared, so every
+                            # stream gets a view or a copy of its own.
+                            message["data"] = (
+                                memoryview(message["data"])
+                                if views
+                                else bytes(message["data"])
+                            )
+                        elif message["type"] in ("WordBoundary", "SentenceBoundary"):
+                            # Move the offset onto the timeline of the whole stream.
+                            message["offset"] += self.state["offset_compensation"]
+
+                            # Update the last duration offset for use by the next turn.
+                            self.state["last_duration_offset"] = (
+                                message["offset"] + message["duration"]
+                            )
+
+                        # The audio before the boundary is yielded before it.
+                        if block:
+                            yield self.__join_block(block, views)
+                            block_length = 0
+                            block_start = counter.duration
+                        yield message
+                finally:
+                    await turn.aclose()
+
+                if block:
+                    yield self.__join_block(block, views)
+                    block_length = 0
+                block_start = 0
+
+                turn_duration: float = counter.duration
+                if turn_duration == 0 and self.tts_config.boundary is not None:
+                    # The duration could not be measured, so fall back to the end of the
+                    # last boundary plus the average padding typically added by
+                    # the service to the end of the audio data. Without boundaries,
+                    # there is nothing to fall back to.
+                    turn_duration = (
+                        self.state["last_duration_offset"]
+                        - self.state["offset_compensation"]
+                        + 8_750_000
                     )
+                yield {
+                    "type": "TurnEnd",
+                    "offset": self.state["offset_compensation"],
+                    "duration": turn_duration,
+                }
+
+                # Update the offset compensation for the next turn.
+                self.state["offset_compensation"] += turn_duration
+        finally:
+            await turns.aclose()
+
+    def __pool(self) -> CommunicatePool:
+        """Returns the pool to synthesize over."""
+        if self.pool is not None:
+            return self.pool
+
+        # Without a shared pool, a private pool keeps one connection open
+        # for every turn that is synthesized at the same time.
+        if self.private_pool is None:
+            self.private_pool = CommunicatePool(
+                self.concurrency,
+                connector=self.connector,
+                proxy=self.proxy,
+                connect_timeout=self.connect_timeout,
+                receive_timeout=self.receive_timeout,
+            )
+        return self.private_pool
+
+    async def prepare(self) -> None:
+        """
+        Opens the connections of the stream ahead of time, which covers the
+        DNS lookup, the TCP and TLS handshakes, the websocket upgrade and the
+        speech.config message, so that only the turns themselves are left to
+        wait for once streaming starts. The latency this saves is reported in
+        `latency_saved` as the turns are synthesized.
+
+        Without a shared pool, the connections stay open until the stream
+        ends, or until close() is called if the stream is never started.
+
+        Raises:
+            WebSocketError: If there is an error with the websocket.
+        """
+        if self.state["stream_was_called"]:
+            raise RuntimeError("prepare must be called before stream.")
+        await self.__pool().warm(self.tts_config, self.concurrency)
 
-            if not audio_was_received:
-                raise NoAudioReceived(
-                    "No audio was received. Please verify that your parameters are correct."
-                )
+    async def close(self) -> None:
+        """
+        Closes the connections opened by prepare(), which is only needed if
+        the stream is not started after all. A shared pool is left open.
+        """
+        if self.private_pool is not None:
+            await self.private_pool.close()
 
     async def stream(
         self,
@@ -554,24 +587,165 @@ class Communicate:
             UnknownResponse: If the response from the service is unknown.
             WebSocketError: If there is an error with the websocket.
         """
+        messages = self.__run(self.audio_views)
+        try:
+            async for message in messages:
+                yield message
+        finally:
+            await messages.aclose()
+
+    async def __run(self, views: bool) -> AsyncGenerator[TTSChunk, None]:
+        """Streams audio and metadata, see stream(), with audio views if views."""
 
         # Check if stream was called before.
         if self.state["stream_was_called"]:
             raise RuntimeError("stream can only be called once.")
         self.state["stream_was_called"] = True
 
+        pool = self.__pool()
+
+        # Text that is streamed in may take a while to arrive, so the
+        # connections are opened while waiting for the first sentences.
+        warming: "Optional[asyncio.Future[None]]" = None
+        if not isinstance(self.texts, Generator):
+            warming = asyncio.ensure_future(
+                pool.warm(self.tts_config, self.concurrency)
+            )
+
         # Stream the audio and metadata from the service.
-        for self.state["partial_text"] in self.texts:
-            try:
-                async for message in self.__stream():
-                    yield message
-            except aiohttp.ClientResponseError as e:
-                if e.status != 403:
-                    raise
+        messages = self.__stream(pool, views)
+        try:
+            async for message in messages:
+                yield message
+        finally:
+            await messages.aclose()
+            if warming is not None:
+                # A failure to warm up is reported by the turns themselves.
+                warming.cancel()
+                await asyncio.gather(warming, return_exceptions=True)
+            if pool is self.private_pool:
+                await pool.close()
+
+    @classmethod
+    async def batch(
+        cls,
+        items: Mapping[K, str],
+        voice: str = DEFAULT_VOICE,
+        *,
+        pool: Optional[CommunicatePool] = None,
+        concurrency: int = 4,
+        **kwargs: Any,
+    ) -> Dict[K, BatchResult]:
+        """
+        Synthesizes many short texts, such as labels or flash cards, by packing
+        as many of them as fit into a single turn, one sentence per text, and
+        splitting the audio and boundaries of the turn back out per text.
+
+        Args:
+            items (Mapping[K, str]): The texts to synthesize by their ids.
+            voice (str): The voice to use.
+            pool (Optional[CommunicatePool]): The pool to synthesize over.
+                Defaults to a private pool of `concurrency` connections.
+            concurrency (int): The maximum number of turns synthesized at once.
+            **kwargs: The other parameters of Communicate, such as rate or boundary.
+
+        Returns:
+            Dict[K, BatchResult]: The audio and boundaries of every text by its
+                id, with offsets relative to the start of the audio of the text.
+        """
+        # Validate the concurrency parameter.
+        if not isinstance(concurrency, int):
+            raise TypeError("concurrency must be int")
+        if concurrency <= 0:
+            raise ValueError("concurrency must be greater than 0")
+
+        # The audio of a turn can only be split at the frames of MP3 audio.
+        if not kwargs.get("output_format", DEFAULT_OUTPUT_FORMAT).endswith("-mp3"):
+            raise ValueError("batch requires an MP3 output_format")
+
+        # The audio of a turn is split between the boundaries of its texts.
+        if "boundary" in kwargs and kwargs["boundary"] is None:
+            raise ValueError("batch requires a boundary")
+
+        private_pool = None
+        if pool is None:
+            pool = private_pool = CommunicatePool(
+                concurrency,
+                connector=kwargs.pop("connector", None),
+                proxy=kwargs.pop("proxy", None),
+                connect_timeout=kwargs.pop("connect_timeout", 10),
+                receive_timeout=kwargs.pop("receive_timeout", 60),
+            )
+        semaphore = asyncio.Semaphore(concurrency)
+        results: Dict[K, BatchResult] = {}
+
+        async def synthesize(group: List[Tuple[K, str]]) -> None:
+            texts = [text for _, text in group]
+            messages: List[TTSChunk] = []
+            async with semaphore:
+                communicate = cls("\n".join(texts), voice, pool=pool, **kwargs)
+                async for message in communicate.stream():
+                    if message["type"] != "TurnEnd":
+                        messages.append(message)
+            for (key, _), result in zip(group, split_batch(texts, messages)):
+                results[key] = result
+
+        terminated = [(key, terminate_sentence(text)) for key, text in items.items()]
+        tasks = [
+            asyncio.ensure_future(synthesize(group))
+            for group in pack_items(terminated, 4096)
+        ]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            # Stop the other turns if one of them failed.
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if private_pool is not None:
+                await private_pool.close()
+
+        # Return the results in the order of the items.
+        return {key: results[key] for key in items}
+
+    @property
+    def file_extension(self) -> str:
+        """
+        The extension of files holding audio in the output format.
+
+        Returns:
+            str: The file extension, such as ".mp3".
+        """
+        return OUTPUT_FORMATS[self.tts_config.output_format][1]
 
-                DRM.handle_client_response_error(e)
-                async for message in self.__stream():
-                    yield message
+    async def stream_into(
+        self,
+        writer: AudioWriter,
+        on_boundary: Optional[Callable[[TTSChunk], object]] = None,
+    ) -> int:
+        """
+        Streams the audio into the given writer instead of yielding it.
+
+        The writer is handed views of the messages the audio was received in,
+        or of the coalesced blocks, so the audio is not copied before the
+        writer copies it, whatever audio_views is set to.
+
+        Args:
+            writer (AudioWriter): The writer of the audio, such as a binary file.
+            on_boundary (Optional[Callable[[TTSChunk], object]]): Called with
+                every WordBoundary and SentenceBoundary, in order with the audio.
+                Like the writes, the result is awaited if it is awaitable.
+
+        Returns:
+            int: The number of bytes of audio written.
+
+        Raises:
+            NoAudioReceived: If no audio is received from the service.
+            UnexpectedResponse: If the response from the service is unexpected.
+            UnknownResponse: If the response from the service is unknown.
+            WebSocketError: If there is an error with the websocket.
+        """
+        return await write_stream(self.__run(True), writer, on_boundary)
 
     async def save(
         self,
@@ -579,48 +753,24 @@ class Communicate:
         metadata_fname: Optional[Union[str, bytes]] = None,
     ) -> None:
         """
-        Save the audio and metadata to the specified files.
+        Save the audio and metadata to the specified files. The audio is
+        written in the output format, see `file_extension`.
+
+        The files are written by a worker thread, see FileWriter, and only
+        appear once they are complete.
         """
-        metadata: Union[TextIOWrapper, ContextManager[None]] = (
-            open(metadata_fname, "w", encoding="utf-8")
-            if metadata_fname is not None
-            else nullcontext()
-        )
-        with metadata, open(audio_fname, "wb") as audio:
-            async for message in self.stream():
-                if message["type"] == "audio":
-                    audio.write(message["data"])
-                elif isinstance(metadata, TextIOWrapper) and message["type"] in (
-                    "WordBoundary",
-                    "SentenceBoundary",
-                ):
-                    json.dump(message, metadata)
-                    metadata.write("\n")
+        await save_stream(self.__run(True), audio_fname, metadata_fname)
 
     def stream_sync(self) -> Generator[TTSChunk, None, None]:
-        """Synchronous interface for async stream method"""
-
-        def fetch_async_items(queue: Queue) -> None:  # type: ignore
-            async def get_items() -> None:
-                async for item in self.stream():
-                    queue.put(item)
-                queue.put(None)
-
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            loop.run_until_complete(get_items())
-            loop.close()
-
-        queue: Queue = Queue()  # type: ignore
-
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            executor.submit(fetch_async_items, queue)
+        """
+        Synchronous interface for async stream method.
 
-            while True:
-                item = queue.get()
-                if item is None:
-                    break
-                yield item
+        The stream runs on an event loop in a background thread, which is
+        shared by all synchronous calls. Audio is produced at most a few
+        chunks ahead of the caller, and the stream is cancelled as soon as
+        the caller stops iterating.
+        """
+        yield from RUNNER.iterate(self.stream(), SYNC_QUEUED_CHUNKS)
 
     def save_sync(
         self,
@@ -628,8 +778,4 @@ class Communicate:
         metadata_fname: Optional[Union[str, bytes]] = None,
     ) -> None:
         """Synchronous interface for async save method."""
-        with concurrent.futures.ThreadPoolExecutor() as executor:
-            future = executor.submit(
-                asyncio.run, self.save(audio_fname, metadata_fname)
-            )
-            future.result()
+        RUNNER.run(self.save(audio_fname, metadata_fname))
@@ -0,0 +1,327 @@
+"""Connection module is used to open websocket connections to the service and
+to share warm connections between Communicate instances through a pool."""
+
+import asyncio
+import functools
+import ssl
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, AsyncIterator, Dict, List, Optional, Type, Union
+
+import aiohttp
+import certifi
+
+from .constants import SEC_MS_GEC_VERSION, WSS_HEADERS, WSS_URL
+from .data_classes import TTSConfig
+from .drm import DRM
+from .flight import Flight
+from .protocol import (
+    connect_id,
+    date_to_string,
+    speech_config_data,
+    speech_config_headers_plus_data,
+)
+from .transport import TRANSPORTS, Transport, WebSocket
+
+
+@functools.lru_cache(maxsize=None)
+def _ssl_context() -> ssl.SSLContext:
+    """
+    Returns the SSL context shared by all pools, which is only created once
+    as loading the certificates takes tens of milliseconds.
+    """
+    return ssl.create_default_context(cafile=certifi.where())
+
+
+class Connection:
+    """
+    A websocket connection to the service that was already sent its
+    speech.config message. A connection handles one turn at a time.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        speech_config: str,
+        sec_ms_gec: str,
+        connect_time: float,
+    ) -> None:
+        self.websocket = websocket
+        self.speech_config = speech_config
+        self.sec_ms_gec = sec_ms_gec
+        self.last_used = time.monotonic()
+
+        # The seconds it took to open and configure the connection, which are
+        # saved every time it is handed out again.
+        self.connect_time = connect_time
+
+        # Whether the connection was already open when it was last handed out.
+        self.reused = False
+
+    def is_healthy(self, max_idle_time: float) -> bool:
+        """
+        Checks whether an idle connection can still be handed out.
+
+        A connection is retired once it is closed or errored, once it has been
+        idle for too long, or once the Sec-MS-GEC token it was opened with is
+        no longer the current one.
+
+        Args:
+            max_idle_time (float): Maximum number of seconds a connection may be idle.
+
+        Returns:
+            bool: True if the connection can be reused.
+        """
+        return (
+            not self.websocket.closed
+            and time.monotonic() - self.last_used < max_idle_time
+            and self.sec_ms_gec == DRM.generate_sec_ms_gec()
+        )
+
+    async def close(self) -> None:
+        """Closes the websocket."""
+        await self.websocket.close()
+
+
+class CommunicatePool:
+    """
+    A pool of warm websocket connections that can be shared by any number of
+    Communicate instances running on the same event loop.
+
+    Connections are handed out for a single turn and returned to the pool
+    afterwards, so the connect latency is only paid when no idle connection
+    is available. At most `max_connections` connections are open at any time,
+    which also caps the number of turns being synthesized concurrently.
+
+    Identical turns requested by several streams at the same time are only
+    synthesized once, and shared by all of them.
+
+    Connections are opened with aiohttp by default. The `transport` can also
+    be "websockets" or "wsproto" if that library is installed, or a subclass
+    of Transport for another websocket client.
+    """
+
+    # pylint: disable=too-many-instance-attributes
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        max_connections: int = 4,
+        *,
+        connector: Optional[aiohttp.BaseConnector] = None,
+        proxy: Optional[str] = None,
+        connect_timeout: Optional[int] = 10,
+        receive_timeout: Optional[int] = 60,
+        max_idle_time: float = 60.0,
+        transport: Union[str, Type[Transport]] = "aiohttp",
+    ):
+        # Validate the max_connections parameter.
+        if not isinstance(max_connections, int):
+            raise TypeError("max_connections must be int")
+        if max_connections <= 0:
+            raise ValueError("max_connections must be greater than 0")
+        self.max_connections = max_connections
+
+        # Validate the proxy parameter.
+        if proxy is not None and not isinstance(proxy, str):
+            raise TypeError("proxy must be str")
+        self.proxy: Optional[str] = proxy
+
+        # Validate the timeout parameters.
+        if not isinstance(connect_timeout, int):
+            raise TypeError("connect_timeout must be int")
+        if not isinstance(receive_timeout, int):
+            raise TypeError("receive_timeout must be int")
+
+        # Validate the connector parameter.
+        if connector is not None and not isinstance(connector, aiohttp.BaseConnector):
+            raise TypeError("connector must be aiohttp.BaseConnector")
+
+        # Validate the transport parameter.
+        if isinstance(transport, str):
+            if transport not in TRANSPORTS:
+                raise ValueError(f"Invalid transport '{transport}'.")
+            transport = TRANSPORTS[transport]
+        elif not isinstance(transport, type) or not issubclass(transport, Transport):
+            raise TypeError("transport must be str or a subclass of Transport")
+        self.transport = transport(
+            connector=connector,
+            proxy=proxy,
+            connect_timeout=connect_timeout,
+            receive_timeout=receive_timeout,
+            ssl_ctx=_ssl_context(),
+        )
+
+        # Validate the max_idle_time parameter.
+        if not isinstance(max_idle_time, (int, float)):
+            raise TypeError("max_idle_time must be int or float")
+        self.max_idle_time = max_idle_time
+
+        # The semaphore is created lazily so that it is bound to the event loop
+        # the pool is first used on.
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        self.idle: List[Connection] = []
+        self.busy = 0
+        self.closed = False
+
+        # The turns being synthesized over the pool, keyed by cache_key().
+        self.flights: Dict[str, Flight] = {}
+
+        # The seconds of connect latency that turns did not have to wait for,
+        # because they were handed a connection that was already open.
+        self.latency_saved = 0.0
+
+    async def __open(self, speech_config: str) -> Connection:
+        """Opens a new connection and sends it the speech.config message."""
+
+        start = time.monotonic()
+
+        async def ws_connect() -> Connection:
+            sec_ms_gec = DRM.generate_sec_ms_gec()
+            websocket = await self.transport.open(
+                f"{WSS_URL}&ConnectionId={connect_id()}"
+                f"&Sec-MS-GEC={sec_ms_gec}"
+                f"&Sec-MS-GEC-Version={SEC_MS_GEC_VERSION}",
+                WSS_HEADERS,
+            )
+            return Connection(websocket, speech_config, sec_ms_gec, 0.0)
+
+        try:
+            connection = await ws_connect()
+        except Exception as e:  # pylint: disable=broad-except
+            rejection = self.transport.rejection(e)
+            if rejection is None or rejection[0] != 403:
+                raise
+
+            DRM.handle_server_date(rejection[1], e)
+            connection = await ws_connect()
+
+        try:
+            await connection.websocket.send(
+                speech_config_headers_plus_data(date_to_string(), speech_config)
+            )
+        except BaseException:
+            await connection.close()
+            raise
+
+        connection.connect_time = time.monotonic() - start
+        return connection
+
+    async def __acquire(self, speech_config: str) -> Connection:
+        """Returns a healthy idle connection, or opens a new one."""
+        connection: Optional[Connection] = None
+        retired: List[Connection] = []
+        for idle in reversed(self.idle):
+            if not idle.is_healthy(self.max_idle_time):
+                retired.append(idle)
+            elif connection is None and idle.speech_config == speech_config:
+                connection = idle
+        for idle in retired:
+            self.idle.remove(idle)
+        if connection is not None:
+            self.idle.remove(connection)
+            connection.reused = True
+        elif self.idle and len(self.idle) + self.busy > self.max_connections:
+            # Make room by closing the least recently used idle connection,
+            # which has a different speech.config than the one requested.
+            retired.append(self.idle.pop(0))
+
+        for idle in retired:
+            await idle.close()
+
+        if connection is None:
+            connection = await self.__open(speech_config)
+        return connection
+
+    @asynccontextmanager
+    async def __connection(
+        self, tts_config: TTSConfig, turn: bool
+    ) -> AsyncIterator[Connection]:
+        """Hands out a connection, see connection(), or for warm() if not turn."""
+        if self.closed:
+            raise RuntimeError("CommunicatePool is closed.")
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_connections)
+
+        async with self.semaphore:
+            self.busy += 1
+            try:
+                connection = await self.__acquire(speech_config_data(tts_config))
+                if turn and connection.reused:
+                    self.latency_saved += connection.connect_time
+                try:
+                    yield connection
+                except BaseException:
+                    await connection.close()
+                    raise
+            finally:
+                self.busy -= 1
+
+            connection.last_used = time.monotonic()
+            if self.closed or connection.websocket.closed:
+                await connection.close()
+            else:
+                self.idle.append(connection)
+
+    def connection(self, tts_config: TTSConfig) -> AsyncContextManager[Connection]:
+        """
+        Hands out a connection configured for the given TTS configuration for
+        the duration of a single turn.
+
+        The connection is returned to the pool if the block exits normally,
+        which must only happen once the turn has ended. If the block raises,
+        the connection is closed instead as it may be in the middle of a turn.
+
+        Args:
+            tts_config (TTSConfig): The TTS configuration of the turn.
+
+        Returns:
+            AsyncContextManager[Connection]: The connection to use for the turn.
+        """
+        return self.__connection(tts_config, True)
+
+    async def warm(self, tts_config: TTSConfig, connections: int = 1) -> None:
+        """
+        Opens connections for the given TTS configuration ahead of time, so
+        that the next turns do not have to wait for the connect latency.
+        Idle connections that are already open are reused. The latency saved
+        this way is added to `latency_saved` once the connections are used.
+
+        Args:
+            tts_config (TTSConfig): The TTS configuration of the next turns.
+            connections (int): The number of connections that should be idle.
+        """
+        connections = min(connections, self.max_connections)
+
+        # Every connection is held until all of them are, as an idle connection
+        # handed back right away would be handed out again to the next one.
+        remaining = connections
+        all_held = asyncio.Event()
+
+        async def warm_connection() -> None:
+            nonlocal remaining
+            try:
+                async with self.__connection(tts_config, False):
+                    remaining -= 1
+                    if remaining == 0:
+                        all_held.set()
+                    await all_held.wait()
+            finally:
+                # The others are released if this one could not be opened.
+                all_held.set()
+
+        await asyncio.gather(*(warm_connection() for _ in range(connections)))
+
+    async def close(self) -> None:
+        """Closes all idle connections and the underlying transport."""
+        self.closed = True
+        idle, self.idle = self.idle, []
+        for connection in idle:
+            await connection.close()
+        await self.transport.close()
+
+    async def __aenter__(self) -> "CommunicatePool":
+        return self
+
+    async def __aexit__(self, *args: object) -> None:
+        await self.close()
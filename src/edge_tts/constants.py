@@ -12,6 +12,26 @@ VOICE_LIST = (
 
 DEFAULT_VOICE = "en-US-EmmaMultilingualNeural"
 
+DEFAULT_OUTPUT_FORMAT = "audio-24khz-48kbitrate-mono-mp3"
+# Output formats supported by the service, mapped to the content types their
+# audio data is sent with and the extension of the files they are saved to.
+OUTPUT_FORMATS = {
+    "audio-24khz-48kbitrate-mono-mp3": (("audio/mpeg",), ".mp3"),
+    "audio-24khz-96kbitrate-mono-mp3": (("audio/mpeg",), ".mp3"),
+    "webm-24khz-16bit-mono-opus": (("audio/webm",), ".webm"),
+    "ogg-24khz-16bit-mono-opus": (("audio/ogg",), ".ogg"),
+    "raw-16khz-16bit-mono-pcm": (("audio/x-wav", "audio/pcm"), ".pcm"),
+    "raw-24khz-16bit-mono-pcm": (("audio/x-wav", "audio/pcm"), ".pcm"),
+    "raw-48khz-16bit-mono-pcm": (("audio/x-wav", "audio/pcm"), ".pcm"),
+}
+# The output format used for files with each extension, when none is given.
+EXTENSION_OUTPUT_FORMATS = {
+    ".mp3": DEFAULT_OUTPUT_FORMAT,
+    ".webm": "webm-24khz-16bit-mono-opus",
+    ".ogg": "ogg-24khz-16bit-mono-opus",
+    ".pcm": "raw-24khz-16bit-mono-pcm",
+}
+
 CHROMIUM_FULL_VERSION = "140.0.3485.14"
 CHROMIUM_MAJOR_VERSION = CHROMIUM_FULL_VERSION.split(".", maxsplit=1)[0]
 SEC_MS_GEC_VERSION = f"1-{CHROMIUM_FULL_VERSION}"
@@ -41,3 +61,6 @@ VOICE_HEADERS = {
     "Sec-Fetch-Dest": "empty",
 }
 VOICE_HEADERS.update(BASE_HEADERS)
+
+# The number of chunks the synchronous stream produces ahead of its caller.
+SYNC_QUEUED_CHUNKS = 64
@@ -5,9 +5,12 @@
 import argparse
 import re
 from dataclasses import dataclass
+from typing import Optional
 
 from typing_extensions import Literal
 
+from .constants import DEFAULT_OUTPUT_FORMAT, OUTPUT_FORMATS
+
 
 @dataclass
 class TTSConfig:
@@ -19,7 +22,8 @@ class TTSConfig:
     rate: str
     volume: str
     pitch: str
-    boundary: Literal["WordBoundary", "SentenceBoundary"]
+    boundary: Optional[Literal["WordBoundary", "SentenceBoundary"]]
+    output_format: str = DEFAULT_OUTPUT_FORMAT
 
     @staticmethod
     def validate_string_param(param_name: str, param_value: str, pattern: str) -> str:
@@ -75,12 +79,47 @@ class TTSConfig:
         self.validate_string_param("volume", self.volume, r"^[+-]\d+%$")
         self.validate_string_param("pitch", self.pitch, r"^[+-]\d+Hz$")
 
+        # Validate the boundary parameter. None disables the metadata.
+        if self.boundary not in (None, "WordBoundary", "SentenceBoundary"):
+            raise ValueError(f"Invalid boundary '{self.boundary}'.")
+
+        # Validate the output format parameter.
+        if not isinstance(self.output_format, str):
+            raise TypeError("output_format must be str")
+        if self.output_format not in OUTPUT_FORMATS:
+            raise ValueError(f"Invalid output_format '{self.output_format}'.")
+
+
+@dataclass
+class DialogueSegment:
+    """
+    Represents a segment of a dialogue, spoken by a single voice.
+    """
+
+    voice: str
+    text: str
+    rate: str = "+0%"
+    volume: str = "+0%"
+    pitch: str = "+0Hz"
+    speaker: Optional[str] = None  # defaults to the voice
+
+    def __post_init__(self) -> None:
+        """
+        Validates the DialogueSegment object after initialization.
+        """
+        if not isinstance(self.text, str):
+            raise TypeError("text must be str")
+        if self.speaker is None:
+            self.speaker = self.voice
+        if not isinstance(self.speaker, str):
+            raise TypeError("speaker must be str")
+
 
 class UtilArgs(argparse.Namespace):
     """CLI arguments."""
 
-    text: str
-    file: str
+    text: Optional[str]
+    file: Optional[str]
     voice: str
     list_voices: bool
     rate: str
@@ -88,4 +127,5 @@ class UtilArgs(argparse.Namespace):
     pitch: str
     write_media: str
     write_subtitles: str
+    output_format: Optional[str]
     proxy: str
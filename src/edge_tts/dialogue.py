@@ -0,0 +1,188 @@
+"""Dialogue module is used to synthesize scripts with several speakers into a
+single stream, with the subtitles of all speakers on a single timeline."""
+
+import asyncio
+from collections import deque
+from dataclasses import replace
+from typing import AsyncGenerator, Deque, Iterable, List, Optional, Tuple, Union
+
+import aiohttp
+from typing_extensions import Literal
+
+from .communicate import Communicate
+from .connection import CommunicatePool
+from .constants import DEFAULT_OUTPUT_FORMAT
+from .data_classes import DialogueSegment
+from .flight import Flight
+from .typing import TTSChunk
+from .writer import save_stream
+
+
+def _settings(segment: DialogueSegment) -> Tuple[str, ...]:
+    """Returns what must be equal for segments to be synthesized together."""
+    return (
+        segment.voice,
+        segment.rate,
+        segment.volume,
+        segment.pitch,
+        str(segment.speaker),
+    )
+
+
+def merge_segments(segments: Iterable[DialogueSegment]) -> List[DialogueSegment]:
+    """
+    Merges adjacent segments that are spoken by the same speaker with the same
+    voice and prosody, so that they are synthesized as a single part.
+
+    Args:
+        segments (Iterable[DialogueSegment]): The segments of the dialogue.
+
+    Returns:
+        List[DialogueSegment]: The merged segments.
+    """
+    merged: List[DialogueSegment] = []
+    for segment in segments:
+        if not isinstance(segment, DialogueSegment):
+            raise TypeError("segments must be DialogueSegment")
+
+        if merged and _settings(merged[-1]) == _settings(segment):
+            merged[-1] = replace(merged[-1], text=f"{merged[-1].text}\n{segment.text}")
+        else:
+            merged.append(segment)
+    return merged
+
+
+class Dialogue:
+    """
+    Synthesizes a dialogue of segments spoken by different voices.
+
+    Up to `concurrency` segments are synthesized at the same time over a pool
+    of connections, and the audio of all segments is streamed in order as a
+    single stream. Boundaries are placed on the timeline of the whole stream
+    and tagged with the speaker of their segment.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        segments: Iterable[DialogueSegment],
+        *,
+        boundary: Optional[
+            Literal["WordBoundary", "SentenceBoundary"]
+        ] = "SentenceBoundary",
+        connector: Optional[aiohttp.BaseConnector] = None,
+        proxy: Optional[str] = None,
+        connect_timeout: Optional[int] = 10,
+        receive_timeout: Optional[int] = 60,
+        pool: Optional[CommunicatePool] = None,
+        concurrency: int = 4,
+        output_format: str = DEFAULT_OUTPUT_FORMAT,
+    ):
+        # Validate the concurrency parameter.
+        if not isinstance(concurrency, int):
+            raise TypeError("concurrency must be int")
+        if concurrency <= 0:
+            raise ValueError("concurrency must be greater than 0")
+        self.concurrency = concurrency
+
+        # Validate the pool parameter. Without a shared pool, a private pool
+        # keeps one connection open for every segment synthesized at once.
+        if pool is not None and not isinstance(pool, CommunicatePool):
+            raise TypeError("pool must be CommunicatePool")
+        if pool is not None and (connector is not None or proxy is not None):
+            raise ValueError("connector and proxy must be set on the pool instead")
+        self.pool = pool
+        self.private_pool: Optional[CommunicatePool] = None
+        if pool is None:
+            self.private_pool = pool = CommunicatePool(
+                concurrency,
+                connector=connector,
+                proxy=proxy,
+                connect_timeout=connect_timeout,
+                receive_timeout=receive_timeout,
+            )
+
+        # Validate the segments and their settings before anything is sent.
+        self.segments = merge_segments(segments)
+        self.communicates = [
+            Communicate(
+                segment.text,
+                segment.voice,
+                rate=segment.rate,
+                volume=segment.volume,
+                pitch=segment.pitch,
+                boundary=boundary,
+                pool=pool,
+                output_format=output_format,
+            )
+            for segment in self.segments
+        ]
+        self.stream_was_called = False
+
+    async def stream(self) -> AsyncGenerator[TTSChunk, None]:
+        """
+        Streams the audio and metadata of the whole dialogue.
+
+        Raises:
+            NoAudioReceived: If no audio is received from the service.
+            UnexpectedResponse: If the response from the service is unexpected.
+            UnknownResponse: If the response from the service is unknown.
+            WebSocketError: If there is an error with the websocket.
+        """
+
+        # Check if stream was called before.
+        if self.stream_was_called:
+            raise RuntimeError("stream can only be called once.")
+        self.stream_was_called = True
+
+        # The segments after the one being streamed are synthesized in the
+        # background, and their messages are kept until it is their turn.
+        parts = iter(zip(self.segments, self.communicates))
+        window: Deque[Tuple[DialogueSegment, Flight]] = deque()
+        offset = 0.0
+        try:
+            while True:
+                # Keep the window of segments being synthesized full.
+                for segment, communicate in parts:
+                    window.append((segment, Flight(communicate.stream(), lambda: None)))
+                    if len(window) >= self.concurrency:
+                        break
+                if not window:
+                    return
+
+                segment, flight = window[0]
+                duration = 0.0
+                subscription = flight.subscribe()
+                try:
+                    async for message in subscription:
+                        if message["type"] == "TurnEnd":
+                            duration = message["offset"] + message["duration"]
+                        if message["type"] != "audio":
+                            # Move the offset onto the timeline of the dialogue.
+                            message["offset"] += offset
+                        if message["type"] in ("WordBoundary", "SentenceBoundary"):
+                            message["speaker"] = str(segment.speaker)
+                        yield message
+                finally:
+                    await subscription.aclose()
+                window.popleft()
+                offset += duration
+        finally:
+            for _, flight in window:
+                flight.task.cancel()
+            await asyncio.gather(
+                *(flight.task for _, flight in window), return_exceptions=True
+            )
+            if self.private_pool is not None:
+                await self.private_pool.close()
+
+    async def save(
+        self,
+        audio_fname: Union[str, bytes],
+        metadata_fname: Optional[Union[str, bytes]] = None,
+    ) -> None:
+        """
+        Save the audio and metadata of the whole dialogue to the specified files.
+        The files are written like in Communicate.save.
+        """
+        await save_stream(self.stream(), audio_fname, metadata_fname)
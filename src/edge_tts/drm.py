@@ -85,9 +85,25 @@ class DRM:
         Returns:
             None
         """
-        if e.headers is None:
-            raise SkewAdjustmentError("No server date in headers.") from e
-        server_date: Optional[str] = e.headers.get("Date", None)
+        DRM.handle_server_date(
+            e.headers.get("Date", None) if e.headers is not None else None, e
+        )
+
+    @staticmethod
+    def handle_server_date(server_date: Optional[str], e: BaseException) -> None:
+        """
+        Handle the server date of a response that rejected the Sec-MS-GEC token.
+
+        This method adjusts the clock skew based on the server date
+        and raises a SkewAdjustmentError if the server date is missing or invalid.
+
+        Args:
+            server_date (Optional[str]): The Date header of the response.
+            e (BaseException): The exception the response was raised with.
+
+        Returns:
+            None
+        """
         if server_date is None or not isinstance(server_date, str):
             raise SkewAdjustmentError("No server date in headers.") from e
         server_date_parsed: Optional[float] = DRM.parse_rfc2616_date(server_date)
@@ -1,5 +1,7 @@
 """Custom exceptions for the edge-tts package."""
 
+from typing import Dict
+
 
 class EdgeTTSException(Exception):
     """Base exception for the edge-tts package."""
@@ -26,3 +28,12 @@ class WebSocketError(EdgeTTSException):
 
 class SkewAdjustmentError(EdgeTTSException):
     """Raised when an error occurs while adjusting the clock skew."""
+
+
+class WebSocketHandshakeError(EdgeTTSException):
+    """Raised when the server rejects the WebSocket handshake."""
+
+    def __init__(self, message: str, status: int, headers: Dict[str, str]) -> None:
+        super().__init__(message)
+        self.status = status
+        self.headers = headers
@@ -0,0 +1,95 @@
+"""Flight module is used to share a turn that is being synthesized with every
+stream that requests the same turn, so that identical requests made at the
+same time only reach the service once."""
+
+import asyncio
+from typing import AsyncGenerator, Callable, List, Optional
+
+from .typing import TTSChunk
+
+
+class Flight:
+    """
+    A turn being synthesized in the background on behalf of its subscribers.
+
+    Every message of the turn is kept until the turn ends, so that streams
+    that subscribe after it started still receive the turn from its start.
+    The turn is cancelled once all of its subscribers are gone.
+    """
+
+    # pylint: disable=too-few-public-methods
+
+    def __init__(
+        self, messages: AsyncGenerator[TTSChunk, None], on_close: Callable[[], object]
+    ) -> None:
+        """
+        Args:
+            messages (AsyncGenerator[TTSChunk, None]): The messages of the turn.
+            on_close (Callable[[], object]): Called once no stream can subscribe
+                to the flight anymore, because the turn ended or was cancelled.
+        """
+        self.messages: List[TTSChunk] = []
+        self.exception: Optional[BaseException] = None
+        self.done = False
+        self.subscribers = 0
+        self.on_close = on_close
+        self.changed = asyncio.Event()
+        self.task = asyncio.ensure_future(self.__run(messages))
+
+    def __notify(self) -> None:
+        """Wakes up the subscribers waiting for the next message."""
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def __close(self) -> None:
+        if not self.done:
+            self.done = True
+            self.on_close()
+            self.__notify()
+
+    async def __run(self, messages: AsyncGenerator[TTSChunk, None]) -> None:
+        try:
+            async for message in messages:
+                self.messages.append(message)
+                self.__notify()
+        except asyncio.CancelledError as e:
+            # The subscribers must not mistake a cancelled turn for a complete one.
+            self.exception = e
+            raise
+        except Exception as e:  # pylint: disable=broad-except
+            # The exception is raised by every subscriber instead.
+            self.exception = e
+        finally:
+            await messages.aclose()
+            self.__close()
+
+    async def subscribe(self) -> AsyncGenerator[TTSChunk, None]:
+        """
+        Streams the turn from its start. The messages are copies that the
+        subscriber may modify.
+
+        Yields:
+            TTSChunk: The messages of the turn.
+
+        Raises:
+            BaseException: The exception the turn failed with, if any.
+        """
+        self.subscribers += 1
+        try:
+            position = 0
+            while True:
+                while position < len(self.messages):
+                    yield self.messages[position].copy()
+                    position += 1
+                if self.done:
+                    break
+                await self.changed.wait()
+
+            if self.exception is not None:
+                raise self.exception
+        finally:
+            self.subscribers -= 1
+            if self.subscribers == 0 and not self.done:
+                # Nobody is waiting for the rest of the turn anymore.
+                self.__close()
+                self.task.cancel()
@@ -0,0 +1,93 @@
+"""Metadata module is used to parse the audio.metadata messages of the service.
+
+Boundaries sent in the usual format are extracted without decoding the whole
+message. Other messages are decoded with orjson or msgspec if one of them is
+installed, and with the json module otherwise."""
+
+import json
+import re
+from typing import Any, Callable, Optional
+from xml.sax.saxutils import unescape
+
+from .exceptions import UnexpectedResponse, UnknownResponse
+from .typing import TTSChunk
+
+_loads: Callable[[str], Any]
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    try:
+        import msgspec
+
+        _loads = msgspec.json.decode
+    except ImportError:
+        _loads = json.loads
+
+# The start of a boundary in the format the service sends it, up to the end
+# of its text. Texts with JSON escapes are left to the decoder.
+_BOUNDARY = re.compile(
+    r'\{"Metadata":\[\{"Type":"(WordBoundary|SentenceBoundary)",'
+    r'"Data":\{"Offset":(\d+),"Duration":(\d+),"text":\{"Text":"([^"\\]*)"'
+)
+
+
+def extract_boundary(data: str) -> Optional[TTSChunk]:
+    """
+    Extracts the boundary from an audio.metadata message in the format the
+    service sends it, without decoding the rest of the message.
+
+    Args:
+        data (str): The body of the message.
+
+    Returns:
+        Optional[TTSChunk]: The boundary, or None if the message is in another
+            format and has to be decoded.
+    """
+    match = _BOUNDARY.match(data)
+    if match is None:
+        return None
+
+    boundary_type, offset, duration, text = match.groups()
+    return {
+        "type": (
+            "WordBoundary" if boundary_type == "WordBoundary" else "SentenceBoundary"
+        ),
+        "offset": int(offset),
+        "duration": int(duration),
+        "text": unescape(text),
+    }
+
+
+def parse_metadata(data: str) -> TTSChunk:
+    """
+    Returns the boundary of an audio.metadata message.
+
+    Args:
+        data (str): The body of the message.
+
+    Returns:
+        TTSChunk: The boundary, with the offset relative to the start of the turn.
+
+    Raises:
+        UnknownResponse: If the message holds an unknown type of metadata.
+        UnexpectedResponse: If the message holds no boundary.
+    """
+    boundary = extract_boundary(data)
+    if boundary is not None:
+        return boundary
+
+    for meta_obj in _loads(data)["Metadata"]:
+        meta_type = meta_obj["Type"]
+        if meta_type in ("WordBoundary", "SentenceBoundary"):
+            return {
+                "type": meta_type,
+                "offset": meta_obj["Data"]["Offset"],
+                "duration": meta_obj["Data"]["Duration"],
+                "text": unescape(meta_obj["Data"]["text"]["Text"]),
+            }
+        if meta_type in ("SessionEnd",):
+            continue
+        raise UnknownResponse(f"Unknown metadata type: {meta_type}")
+    raise UnexpectedResponse("No WordBoundary metadata found")
@@ -0,0 +1,355 @@
+"""Protocol module implements the protocol of the service without any I/O. It
+builds the messages sent to the service and turns the messages received from
+it into TTSChunks, so that it can be used over any websocket transport."""
+
+import time
+import uuid
+from typing import Dict, Optional, Tuple, Union
+
+from .constants import OUTPUT_FORMATS
+from .data_classes import TTSConfig
+from .exceptions import NoAudioReceived, UnexpectedResponse, UnknownResponse
+from .metadata import parse_metadata
+from .typing import TTSChunk
+
+
+def connect_id() -> str:
+    """
+    Returns a UUID without dashes.
+
+    Returns:
+        str: A UUID without dashes.
+    """
+    return str(uuid.uuid4()).replace("-", "")
+
+
+def date_to_string() -> str:
+    """
+    Return Javascript-style date string.
+
+    Returns:
+        str: Javascript-style date string.
+    """
+    # %Z is not what we want, but it's the only way to get the timezone
+    # without having to use a library. We'll just use UTC and hope for the best.
+    # For example, right now %Z would return EEST when we need it to return
+    # Eastern European Summer Time.
+    return time.strftime(
+        "%a %b %d %Y %H:%M:%S GMT+0000 (Coordinated Universal Time)", time.gmtime()
+    )
+
+
+def speech_config_data(tc: TTSConfig) -> str:
+    """
+    Returns the body of the speech.config message for the given TTS configuration.
+
+    Connections are only interchangeable if they were configured with the same
+    body, so it is also used as the key for idle connections in the pool.
+
+    Args:
+        tc (TTSConfig): The TTS configuration.
+
+    Returns:
+        str: The speech.config message body.
+    """
+    wd = "true" if tc.boundary == "WordBoundary" else "false"
+    sq = "true" if tc.boundary == "SentenceBoundary" else "false"
+    return (
+        '{"context":{"synthesis":{"audio":{"metadataoptions":{'
+        f'"sentenceBoundaryEnabled":"{sq}","wordBoundaryEnabled":"{wd}"'
+        "},"
+        f'"outputFormat":"{tc.output_format}"'
+        "}}}}\r\n"
+    )
+
+
+def speech_config_headers_plus_data(timestamp: str, data: str) -> str:
+    """
+    Returns the headers and data of the speech.config message, which is sent
+    once per connection before any SSML request.
+
+    Returns:
+        str: The headers and data to be used in the request.
+    """
+    return (
+        f"X-Timestamp:{timestamp}\r\n"
+        "Content-Type:application/json; charset=utf-8\r\n"
+        "Path:speech.config\r\n\r\n"
+        f"{data}"
+    )
+
+
+def get_headers_and_data(
+    data: bytes, header_length: int
+) -> Tuple[Dict[bytes, bytes], bytes]:
+    """
+    Returns the headers and data from the given data.
+
+    Args:
+        data (bytes): The data to be parsed.
+        header_length (int): The length of the header.
+
+    Returns:
+        tuple: The headers and data to be used in the request.
+    """
+    if not isinstance(data, bytes):
+        raise TypeError("data must be bytes")
+
+    headers = {}
+    for line in data[:header_length].split(b"\r\n"):
+        key, value = line.split(b":", 1)
+        headers[key] = value
+
+    return headers, data[header_length + 2 :]
+
+
+def _find_header(data: bytes, name: bytes, start: int, end: int) -> Optional[bytes]:
+    """Returns the value of a single header, without parsing the others."""
+    position = data.find(name, start, end)
+    while position > start and data[position - 1] != 0x0A:
+        # The name was found within another header.
+        position = data.find(name, position + 1, end)
+    if position < 0:
+        return None
+
+    position += len(name)
+    value_end = data.find(b"\r\n", position, end)
+    return data[position : value_end if value_end >= 0 else end]
+
+
+def parse_text_message(data: str) -> Tuple[Optional[str], str]:
+    """
+    Returns the Path header and the body of a text message, without encoding
+    the message to bytes or parsing the other headers.
+
+    Args:
+        data (str): The text message.
+
+    Returns:
+        tuple: The Path header, or None if it is missing, and the body.
+    """
+    headers_end = data.find("\r\n\r\n")
+    if headers_end < 0:
+        headers_end = len(data)
+
+    position = data.find("Path:", 0, headers_end)
+    while position > 0 and data[position - 1] != "\n":
+        # The name was found within another header.
+        position = data.find("Path:", position + 1, headers_end)
+    if position < 0:
+        return None, data[headers_end + 4 :]
+
+    value_end = data.find("\r\n", position, headers_end)
+    return (
+        data[position + 5 : value_end if value_end >= 0 else headers_end],
+        data[headers_end + 4 :],
+    )
+
+
+def parse_binary_message(
+    data: bytes,
+) -> Tuple[Optional[bytes], Optional[bytes], memoryview]:
+    """
+    Returns the Path and Content-Type headers and the payload of a binary
+    message, without copying the payload or parsing the other headers.
+
+    Args:
+        data (bytes): The binary message.
+
+    Returns:
+        tuple: The Path and Content-Type headers, or None if they are missing,
+            and a view of the payload, which keeps the message alive.
+
+    Raises:
+        UnexpectedResponse: If the header length is missing or too large.
+    """
+    # Message is too short to contain header length.
+    if len(data) < 2:
+        raise UnexpectedResponse(
+            "We received a binary message, but it is missing the header length."
+        )
+
+    # The first two bytes of the binary message contain the header length.
+    header_length = data[0] << 8 | data[1]
+    headers_end = header_length + 2
+    if headers_end > len(data):
+        raise UnexpectedResponse(
+            "The header length is greater than the length of the data."
+        )
+
+    return (
+        _find_header(data, b"Path:", 2, headers_end),
+        _find_header(data, b"Content-Type:", 2, headers_end),
+        memoryview(data)[headers_end:],
+    )
+
+
+def mkssml(tc: TTSConfig, escaped_text: Union[str, bytes]) -> str:
+    """
+    Creates a SSML string from the given parameters.
+
+    Args:
+        tc (TTSConfig): The TTS configuration.
+        escaped_text (str or bytes): The escaped text. If bytes, it must be UTF-8 encoded.
+
+    Returns:
+        str: The SSML string.
+    """
+    if isinstance(escaped_text, bytes):
+        escaped_text = escaped_text.decode("utf-8")
+
+    return (
+        "<speak version='1.0' xmlns='http://www.w3.org/2001/10/synthesis' xml:lang='en-US'>"
+        f"<voice name='{tc.voice}'>"
+        f"<prosody pitch='{tc.pitch}' rate='{tc.rate}' volume='{tc.volume}'>"
+        f"{escaped_text}"
+        "</prosody>"
+        "</voice>"
+        "</speak>"
+    )
+
+
+def ssml_headers_plus_data(request_id: str, timestamp: str, ssml: str) -> str:
+    """
+    Returns the headers and data to be used in the request.
+
+    Returns:
+        str: The headers and data to be used in the request.
+    """
+
+    return (
+        f"X-RequestId:{request_id}\r\n"
+        "Content-Type:application/ssml+xml\r\n"
+        f"X-Timestamp:{timestamp}Z\r\n"  # This is not a mistake, Microsoft Edge bug.
+        "Path:ssml\r\n\r\n"
+        f"{ssml}"
+    )
+
+
+class TurnProtocol:
+    """
+    The state of a single turn, without any I/O.
+
+    The request of the turn is sent with `request()`, after which every
+    message received on the connection is passed to `receive()`, which
+    returns the TTSChunk the message holds, if any. Once `ended` is set, the
+    connection can be used for the next turn.
+
+    Audio data is returned as a read-only view of the received message, which
+    is never copied here.
+    """
+
+    def __init__(self, tts_config: TTSConfig, partial_text: bytes) -> None:
+        """
+        Args:
+            tts_config (TTSConfig): The TTS configuration of the turn.
+            partial_text (bytes): The escaped text of the turn.
+        """
+        self.tts_config = tts_config
+        self.partial_text = partial_text
+
+        # The content types that audio in the output format is sent with.
+        self.content_types = tuple(
+            content_type.encode("utf-8")
+            for content_type in OUTPUT_FORMATS[tts_config.output_format][0]
+        )
+
+        # audio_was_received indicates whether we have received audio data
+        # from the websocket. This is so we can raise an exception if we
+        # don't receive any audio data.
+        self.audio_was_received = False
+        self.ended = False
+
+    def request(self) -> str:
+        """
+        Returns the SSML request of the turn.
+
+        Returns:
+            str: The text message to send.
+        """
+        return ssml_headers_plus_data(
+            connect_id(),
+            date_to_string(),
+            mkssml(self.tts_config, self.partial_text),
+        )
+
+    def receive(self, data: Union[str, bytes]) -> Optional[TTSChunk]:
+        """
+        Handles a message received for the turn.
+
+        Args:
+            data (str or bytes): A text or binary message.
+
+        Returns:
+            Optional[TTSChunk]: The audio or boundary the message holds, with
+                offsets relative to the start of the turn, if any.
+
+        Raises:
+            NoAudioReceived: If the turn ended without audio.
+            UnexpectedResponse: If the message is unexpected.
+            UnknownResponse: If the message is unknown.
+        """
+        if isinstance(data, str):
+            return self.__receive_text(data)
+        return self.__receive_binary(data)
+
+    def __receive_text(self, data: str) -> Optional[TTSChunk]:
+        # The message is parsed as it was decoded, without encoding it.
+        path, body = parse_text_message(data)
+        if path == "audio.metadata":
+            # Parse the metadata and return it, unless it was disabled.
+            if self.tts_config.boundary is not None:
+                return parse_metadata(body)
+        elif path == "turn.end":
+            if not self.audio_was_received:
+                raise NoAudioReceived(
+                    "No audio was received. "
+                    "Please verify that your parameters are correct."
+                )
+
+            # The turn is over, the connection can be used for the next one.
+            self.ended = True
+        elif path not in ("response", "turn.start"):
+            raise UnknownResponse("Unknown path received")
+        return None
+
+    def __receive_binary(self, data: bytes) -> Optional[TTSChunk]:
+        # Only the headers needed are read, and the payload is not copied.
+        path, content_type, payload = parse_binary_message(data)
+
+        # Check if the path is audio.
+        if path != b"audio":
+            raise UnexpectedResponse(
+                "Received binary message, but the path is not audio."
+            )
+
+        # At termination of the stream, the service sends a binary message
+        # with no Content-Type; this is expected. What is not expected is for
+        # an audio stream to be sent with no data, or in another format
+        # than the one requested. Parameters such as codecs are ignored.
+        if (
+            content_type is not None
+            and content_type.split(b";")[0].strip() not in self.content_types
+        ):
+            raise UnexpectedResponse(
+                "Received binary message, but with an unexpected Content-Type."
+            )
+
+        # We only allow no Content-Type if there is no data.
+        if content_type is None:
+            if len(payload) == 0:
+                return None
+
+            # If the data is not empty, then we need to raise an exception.
+            raise UnexpectedResponse(
+                "Received binary message with no Content-Type, but with data."
+            )
+
+        # If the data is empty now, then we need to raise an exception.
+        if len(payload) == 0:
+            raise UnexpectedResponse(
+                "Received binary message, but it is missing the audio data."
+            )
+
+        self.audio_was_received = True
+        return {"type": "audio", "data": payload}
@@ -0,0 +1,256 @@
+"""Runner module is used to run the coroutines of the synchronous interfaces on
+a single event loop, which runs in a background thread shared by all of them."""
+
+import asyncio
+import concurrent.futures
+import queue
+import threading
+from typing import (
+    Any,
+    AsyncGenerator,
+    Callable,
+    Coroutine,
+    Generator,
+    Generic,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+T = TypeVar("T")
+
+
+class _Job(Generic[T]):  # pylint: disable=too-few-public-methods
+    """
+    A coroutine running on the loop of a LoopRunner, which can be cancelled
+    and waited for from any other thread.
+    """
+
+    def __init__(
+        self, loop: asyncio.AbstractEventLoop, coroutine: Coroutine[Any, Any, T]
+    ) -> None:
+        self.loop = loop
+        self.finished = threading.Event()
+        self.task: Optional["asyncio.Future[T]"] = None
+        self.cancelled = False
+        self.future = asyncio.run_coroutine_threadsafe(self.__run(coroutine), loop)
+
+    async def __run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        try:
+            # The job may have been cancelled before it started.
+            if self.cancelled:
+                coroutine.close()
+                raise asyncio.CancelledError
+            self.task = asyncio.ensure_future(coroutine)
+            return await self.task
+        finally:
+            self.finished.set()
+
+    def __cancel(self) -> None:
+        self.cancelled = True
+        if self.task is not None:
+            self.task.cancel()
+
+    def cancel(self) -> None:
+        """Cancels the coroutine and waits until it has finished cleaning up."""
+        # The loop may already be closed if the job was cancelled by it.
+        if self.finished.is_set():
+            return
+        self.loop.call_soon_threadsafe(self.__cancel)
+        self.finished.wait()
+
+
+class LoopRunner:
+    """
+    Runs an event loop in a daemon thread, which is started the first time it
+    is needed. Coroutines and async generators can be run on it from any
+    number of other threads at the same time.
+    """
+
+    def __init__(self) -> None:
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.thread: Optional[threading.Thread] = None
+        self.lock = threading.Lock()
+        # The jobs running on the loop, which are cancelled when it is closed.
+        self.jobs: Set[_Job[Any]] = set()
+
+    def __start(self, coroutine: Coroutine[Any, Any, T]) -> _Job[T]:
+        """Runs a coroutine as a job on the loop, which is started if needed."""
+        with self.lock:
+            if self.loop is None:
+                loop = asyncio.new_event_loop()
+                self.thread = threading.Thread(
+                    target=self.__run_forever,
+                    args=(loop,),
+                    name="edge-tts",
+                    daemon=True,
+                )
+                self.thread.start()
+                self.loop = loop
+            if threading.current_thread() is self.thread:
+                raise RuntimeError(
+                    "The synchronous interface cannot be used from its own event loop."
+                )
+            # The job is tracked under the lock, so that close() either sees
+            # it or it runs on a loop that is started again afterwards.
+            job: _Job[T] = _Job(self.loop, coroutine)
+            self.jobs.add(job)
+            return job
+
+    def __finish(self, job: "_Job[Any]") -> None:
+        """Cancels a job if it is still running, and stops tracking it."""
+        job.cancel()
+        with self.lock:
+            self.jobs.discard(job)
+
+    @staticmethod
+    def __run_forever(loop: asyncio.AbstractEventLoop) -> None:
+        """Runs the loop until it is stopped, and closes it afterwards."""
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+            loop.run_until_complete(loop.shutdown_asyncgens())
+        finally:
+            loop.close()
+
+    def close(
+        self, cleanup: Optional[Callable[[], Coroutine[Any, Any, None]]] = None
+    ) -> None:
+        """
+        Cancels the coroutines and generators still running on the loop, and
+        waits until they have finished cleaning up, so that the threads
+        waiting for them get a RuntimeError. Then runs the cleanup, if any,
+        stops the loop and waits for its thread to exit. The loop is started
+        again if the runner is used afterwards.
+
+        Args:
+            cleanup (Optional[Callable[[], Coroutine[Any, Any, None]]]): Returns
+                the coroutine to run on the loop before it is stopped.
+        """
+        if cleanup is not None:
+            self.__cancel(self.__take_jobs())
+            self.run(cleanup())
+
+        with self.lock:
+            loop, thread = self.loop, self.thread
+            if loop is None or thread is None:
+                return
+            jobs = self.__take_jobs_locked()
+            self.loop = self.thread = None
+        self.__cancel(jobs)
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+
+    def __take_jobs(self) -> "Set[_Job[Any]]":
+        """Stops tracking the jobs that are running, and returns them."""
+        with self.lock:
+            return self.__take_jobs_locked()
+
+    def __take_jobs_locked(self) -> "Set[_Job[Any]]":
+        """Like __take_jobs(), for callers that already hold the lock."""
+        if threading.current_thread() is self.thread:
+            raise RuntimeError("The runner cannot be closed from its own event loop.")
+        jobs, self.jobs = self.jobs, set()
+        return jobs
+
+    @staticmethod
+    def __cancel(jobs: "Set[_Job[Any]]") -> None:
+        """Cancels the given jobs, and waits until all of them have finished."""
+        for job in jobs:
+            job.cancel()
+
+    def run(self, coroutine: Coroutine[Any, Any, T]) -> T:
+        """
+        Runs a coroutine on the loop and returns its result. If the calling
+        thread is interrupted, the coroutine is cancelled.
+
+        Args:
+            coroutine (Coroutine[Any, Any, T]): The coroutine to run.
+
+        Returns:
+            T: The result of the coroutine.
+
+        Raises:
+            BaseException: The exception the coroutine raised, if any.
+        """
+        try:
+            job = self.__start(coroutine)
+        except BaseException:
+            coroutine.close()
+            raise
+
+        try:
+            return job.future.result()
+        except concurrent.futures.CancelledError:
+            if not job.cancelled:
+                raise
+            raise RuntimeError("The runner was closed.") from None
+        finally:
+            self.__finish(job)
+
+    def iterate(
+        self, generator: AsyncGenerator[T, None], max_queued: int
+    ) -> Generator[T, None, None]:
+        """
+        Runs an async generator on the loop and yields its items.
+
+        At most `max_queued` items are produced ahead of the caller, so a slow
+        caller slows down the generator instead of having its items pile up.
+        The exception the generator raised, if any, is raised in the caller,
+        and the generator is closed as soon as the caller stops iterating.
+
+        Args:
+            generator (AsyncGenerator[T, None]): The generator to run.
+            max_queued (int): The number of items that can be produced ahead.
+
+        Yields:
+            T: The items of the generator.
+
+        Raises:
+            BaseException: The exception the generator raised, if any.
+        """
+        # Items are handed off with whether they are an item, or else the
+        # exception the generator raised, or None once it is exhausted.
+        handoff: "queue.Queue[Tuple[bool, Any]]" = queue.Queue()
+        # The semaphore is created on the loop, before the first item is put.
+        slots: List[asyncio.Semaphore] = []
+
+        async def produce() -> None:
+            slot = asyncio.Semaphore(max_queued)
+            slots.append(slot)
+            try:
+                async for item in generator:
+                    await slot.acquire()
+                    handoff.put((True, item))
+            except asyncio.CancelledError:
+                # Before Python 3.8, CancelledError is an Exception. The caller
+                # may be waiting for the next item if the runner was closed.
+                handoff.put((False, RuntimeError("The runner was closed.")))
+                raise
+            except Exception as e:  # pylint: disable=broad-except
+                # The exception is raised by the caller instead.
+                handoff.put((False, e))
+            else:
+                handoff.put((False, None))
+            finally:
+                await generator.aclose()
+
+        job = self.__start(produce())
+        try:
+            while True:
+                is_item, value = handoff.get()
+                if not is_item:
+                    if value is not None:
+                        raise value
+                    return
+
+                job.loop.call_soon_threadsafe(slots[0].release)
+                yield value
+        finally:
+            self.__finish(job)
+
+
+# The runner shared by all synchronous interfaces.
+RUNNER = LoopRunner()
@@ -38,12 +38,17 @@ class SubMaker:
                 f"Expected message type '{self.type}', but got '{msg['type']}'."
             )
 
+        # Cues of a dialogue are tagged with the speaker.
+        content = msg["text"]
+        if "speaker" in msg:
+            content = f"{msg['speaker']}: {content}"
+
         self.cues.append(
             Subtitle(
                 index=len(self.cues) + 1,
                 start=timedelta(microseconds=msg["offset"] / 10),
                 end=timedelta(microseconds=(msg["offset"] + msg["duration"]) / 10),
-                content=msg["text"],
+                content=content,
             )
         )
 
@@ -0,0 +1,426 @@
+"""Text module is used to prepare the text for the service and to split it
+into chunks that are small enough to be sent in a single request. Text is
+read, prepared and split lazily, so that sources of any size can be used."""
+
+import codecs
+import mmap
+import os
+import re
+from io import BytesIO
+from typing import AsyncGenerator, AsyncIterable, BinaryIO, Generator, TextIO, Union
+
+# Whitespace removed by bytes.strip().
+_ASCII_WHITESPACE = b" \t\n\r\x0b\x0c"
+
+# Control characters that the service does not support.
+_INCOMPATIBLE_CHARACTERS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# Number of characters, or bytes, of text that are read and prepared at once.
+_TEXT_BLOCK_SIZE = 1024 * 1024
+
+# Closing quotes and brackets that belong to the sentence they follow:
+# " ' ) ] ” ’ 」 』 ）
+_SENTENCE_CLOSER = (
+    rb"(?:[\"')\]]|\xe2\x80\x9d|\xe2\x80\x99|\xe3\x80\x8d|\xe3\x80\x8f|\xef\xbc\x89)"
+)
+
+# The CJK full stop, exclamation and question marks: 。！？
+_CJK_SENTENCE_TERMINATOR = rb"(?:\xe3\x80\x82|\xef\xbc\x81|\xef\xbc\x9f)"
+
+# The end of a sentence in prepared text. It only matches once the character
+# after it is known, so that a sentence is never cut before its closing
+# quotes, or at the period of a number such as 3.14. Periods, exclamation and
+# question marks and ellipses must be followed by whitespace, while the CJK
+# marks need no whitespace after them, only a character that neither
+# continues the terminators nor closes the sentence. Otherwise the match
+# could backtrack to end before a terminator or closer at the end of the text
+# fed so far, and cut the sentence where the whole text would not be cut.
+_SENTENCE_END = re.compile(
+    rb"(?:[.!?]|\xe2\x80\xa6)+" + _SENTENCE_CLOSER + rb"*(?=\s)"
+    rb"|" + _CJK_SENTENCE_TERMINATOR + rb"+" + _SENTENCE_CLOSER + rb"*"
+    rb"(?=.)(?!" + _CJK_SENTENCE_TERMINATOR + rb"|" + _SENTENCE_CLOSER + rb")"
+    rb"|\n",
+    re.DOTALL,
+)
+
+# The number of bytes after a sentence end needed to tell whether it ends
+# there, which is the length of the longest terminator or closer.
+_SENTENCE_END_LOOKAHEAD = 3
+
+
+def remove_incompatible_characters(string: Union[str, bytes]) -> str:
+    """
+    The service does not support a couple character ranges.
+    Most important being the vertical tab character which is
+    commonly present in OCR-ed PDFs. Not doing this will
+    result in an error from the service.
+
+    Args:
+        string (str or bytes): The string to be cleaned.
+
+    Returns:
+        str: The cleaned string.
+    """
+    if isinstance(string, bytes):
+        string = string.decode("utf-8")
+    if not isinstance(string, str):
+        raise TypeError("string must be str or bytes")
+
+    return _INCOMPATIBLE_CHARACTERS.sub(" ", string)
+
+
+def prepare_text(text: str) -> bytes:
+    """
+    Prepares text to be sent to the service in a single pass. This is
+    equivalent to `escape(remove_incompatible_characters(text)).encode()`,
+    but the text is cleaned, escaped and encoded one block at a time, so
+    only the encoded result is kept in memory in addition to the input.
+
+    Args:
+        text (str): The text to be prepared.
+
+    Returns:
+        bytes: The cleaned, XML escaped and UTF-8 encoded text.
+    """
+    if not isinstance(text, str):
+        raise TypeError("text must be str")
+
+    prepared = BytesIO()
+    for start in range(0, len(text), _TEXT_BLOCK_SIZE):
+        prepared.write(_prepare_block(text[start : start + _TEXT_BLOCK_SIZE]))
+    return prepared.getvalue()
+
+
+def _prepare_block(block: str) -> bytes:
+    """
+    Cleans, XML escapes and UTF-8 encodes a block of text. Blocks can be
+    prepared independently as every step works on single characters.
+
+    Args:
+        block (str): The block of text.
+
+    Returns:
+        bytes: The prepared block.
+    """
+    block = _INCOMPATIBLE_CHARACTERS.sub(" ", block)
+    block = block.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+    return block.encode("utf-8")
+
+
+def _read_text_blocks(
+    source: Union[str, "os.PathLike[str]", mmap.mmap, BinaryIO, TextIO],
+) -> Generator[str, None, None]:
+    """
+    Reads a text source one block at a time. Binary sources are decoded
+    as UTF-8 incrementally, so characters may span several blocks.
+
+    Args:
+        source (str, os.PathLike, mmap.mmap or file object): The text source.
+
+    Yields:
+        str: The blocks of text.
+    """
+    if isinstance(source, str):
+        for start in range(0, len(source), _TEXT_BLOCK_SIZE):
+            yield source[start : start + _TEXT_BLOCK_SIZE]
+        return
+
+    if isinstance(source, os.PathLike):
+        with open(source, "rb") as file:
+            yield from _read_text_blocks(file)
+        return
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    if isinstance(source, mmap.mmap):
+        for start in range(0, len(source), _TEXT_BLOCK_SIZE):
+            yield decoder.decode(source[start : start + _TEXT_BLOCK_SIZE])
+    else:
+        while True:
+            block = source.read(_TEXT_BLOCK_SIZE)
+            if not block:
+                break
+            yield block if isinstance(block, str) else decoder.decode(block)
+    yield decoder.decode(b"", final=True)
+
+
+def _find_last_newline_or_space_within_limit(text: bytes, start: int, end: int) -> int:
+    """
+    Finds the index of the rightmost preferred split character (newline or space)
+    within `text[start:end]`.
+
+    This helps find a natural word or sentence boundary for splitting, prioritizing
+    newlines over spaces.
+
+    Args:
+        text (bytes): The byte string to search within.
+        start (int): The index to start searching from.
+        end (int): The maximum index (exclusive) to search up to.
+
+    Returns:
+        int: The index of the last found newline or space within the range,
+             or -1 if neither is found in that range.
+    """
+    # Prioritize finding a newline character
+    split_at = text.rfind(b"\n", start, end)
+    # If no newline is found, search for a space
+    if split_at < 0:
+        split_at = text.rfind(b" ", start, end)
+    return split_at
+
+
+def _find_safe_utf8_split_point(text: bytes, start: int, end: int) -> int:
+    """
+    Finds the rightmost possible byte index in `text[start:end + 1]` that is not
+    in the middle of a multi-byte UTF-8 character, such that `text[start:index]`
+    is a valid UTF-8 sequence.
+
+    UTF-8 continuation bytes always have the bit pattern 10xxxxxx, so the split
+    point is found by moving backwards until it is on any other byte.
+
+    Args:
+        text (bytes): The byte string being split.
+        start (int): The index of the start of the segment.
+        end (int): The proposed split point.
+
+    Returns:
+        int: The index of the safe split point. Returns `start` if no valid
+             split point is found (e.g., if the first byte is part of a
+             multi-byte sequence longer than the limit allows).
+    """
+    split_at = end
+    while start < split_at < len(text) and text[split_at] & 0xC0 == 0x80:
+        # The byte at split_at continues the character before it, try earlier
+        split_at -= 1
+
+    return split_at
+
+
+def _adjust_split_point_for_xml_entity(text: bytes, start: int, split_at: int) -> int:
+    """
+    Adjusts a proposed split point backward to prevent splitting inside an XML entity.
+
+    For example, if `text` is `b"this &amp; that"` and `split_at` falls between
+    `&` and `;`, this function moves `split_at` to the index before `&`.
+
+    Args:
+        text (bytes): The byte string being split.
+        start (int): The index of the start of the segment.
+        split_at (int): The proposed split point index, determined by whitespace
+                        or UTF-8 safety.
+
+    Returns:
+        int: The adjusted split point index. It will be moved to the '&'
+             if an unterminated entity is detected right before the original `split_at`.
+             Otherwise, the original `split_at` is returned.
+    """
+    while split_at > start:
+        ampersand_index = text.rfind(b"&", start, split_at)
+        if ampersand_index < 0:
+            break
+
+        # Check if a semicolon exists between the ampersand and the split point
+        if text.find(b";", ampersand_index, split_at) != -1:
+            # Found a terminated entity (like &amp;), safe to break at original split_at
+            break
+
+        # Ampersand is not terminated before split_at, move split_at to it
+        split_at = ampersand_index
+
+    return split_at
+
+
+def _strip(text: bytes, start: int, end: int) -> bytes:
+    """
+    Returns `text[start:end].strip()` without copying more than the result.
+
+    Args:
+        text (bytes): The byte string being split.
+        start (int): The index of the start of the segment.
+        end (int): The index of the end of the segment (exclusive).
+
+    Returns:
+        bytes: The segment stripped of leading and trailing ASCII whitespace.
+    """
+    while start < end and text[start] in _ASCII_WHITESPACE:
+        start += 1
+    while end > start and text[end - 1] in _ASCII_WHITESPACE:
+        end -= 1
+    return text[start:end]
+
+
+class _TextSplitter:
+    """
+    Incrementally splits prepared text into chunks for the service.
+
+    Where a chunk ends only depends on the `byte_length + 3` bytes after its
+    start, so feeding the text in blocks yields exactly the same chunks as
+    splitting it at once, while keeping at most one chunk of text buffered.
+
+    With `sentences` set, a chunk also ends after every sentence as soon as the
+    sentence is known to be complete, so that text that is still being
+    generated can be synthesized one sentence at a time.
+    """
+
+    def __init__(self, byte_length: int, sentences: bool = False) -> None:
+        if byte_length <= 0:
+            raise ValueError("byte_length must be greater than 0")
+        self.byte_length = byte_length
+        self.sentences = sentences
+        self.buffer = b""
+        self.start = 0
+
+    def feed(self, text: bytes) -> Generator[bytes, None, None]:
+        """
+        Feeds the next block of text and yields every chunk that is complete.
+        The generator must be exhausted before feeding the next block.
+
+        Args:
+            text (bytes): The next block of prepared text.
+
+        Yields:
+            bytes: The complete chunks.
+        """
+        buffer = self.buffer[self.start :] + text if self.buffer else text
+        self.buffer, self.start = buffer, 0
+
+        while True:
+            start = self.start
+            end = start + self.byte_length
+
+            if self.sentences:
+                # Cut after the first complete sentence that fits in a chunk.
+                sentence_end = _SENTENCE_END.search(
+                    buffer, start, end + _SENTENCE_END_LOOKAHEAD
+                )
+                if sentence_end is not None and sentence_end.end() <= end:
+                    self.start = sentence_end.end()
+                    chunk = _strip(buffer, start, self.start)
+                    if chunk:
+                        yield chunk
+                    continue
+
+            if len(buffer) - start <= self.byte_length:
+                break
+
+            # Find the initial split point based on whitespace or UTF-8 boundary
+            split_at = _find_last_newline_or_space_within_limit(buffer, start, end)
+
+            if split_at < 0:
+                # No newline or space found, so we need to find a safe UTF-8
+                # split point
+                split_at = _find_safe_utf8_split_point(buffer, start, end)
+
+            # Adjust the split point to avoid cutting in the middle of an xml entity,
+            # such as '&amp;'
+            split_at = _adjust_split_point_for_xml_entity(buffer, start, split_at)
+
+            # Prepare for the next iteration
+            # If the split point did not move, advance by 1 to avoid infinite loop
+            self.start = split_at if split_at > start else start + 1
+
+            # Yield the chunk
+            chunk = _strip(buffer, start, split_at)
+            if chunk:
+                yield chunk
+
+    def close(self) -> Generator[bytes, None, None]:
+        """
+        Yields the remaining text once there is no more text to feed.
+
+        Yields:
+            bytes: The last chunk, if any.
+        """
+        remaining_chunk = _strip(self.buffer, self.start, len(self.buffer))
+        self.buffer, self.start = b"", 0
+        if remaining_chunk:
+            yield remaining_chunk
+
+
+def split_text_by_byte_length(
+    text: Union[str, bytes], byte_length: int
+) -> Generator[bytes, None, None]:
+    """
+    Splits text into chunks, each not exceeding a maximum byte length.
+
+    This function prioritizes splitting at natural boundaries (newlines, spaces)
+    while ensuring that:
+    1. No chunk exceeds `byte_length` bytes.
+    2. Chunks do not end with an incomplete UTF-8 multi-byte character.
+    3. Chunks do not split XML entities (like `&amp;`) in the middle.
+
+    The text is scanned with a cursor, so apart from the chunks themselves
+    nothing is copied and the running time is linear in the size of the text.
+
+    Args:
+        text (str or bytes): The input text. If str, it's encoded to UTF-8.
+        byte_length (int): The maximum allowed byte length for any yielded chunk.
+                           Must be positive.
+
+    Yields:
+        bytes: Text chunks (UTF-8 encoded, stripped of leading/trailing whitespace)
+               that conform to the byte length and integrity constraints.
+
+    Raises:
+        TypeError: If `text` is not str or bytes.
+        ValueError: If `byte_length` is not positive.
+    """
+    if isinstance(text, str):
+        text = text.encode("utf-8")
+    if not isinstance(text, bytes):
+        raise TypeError("text must be str or bytes")
+
+    splitter = _TextSplitter(byte_length)
+    yield from splitter.feed(text)
+    yield from splitter.close()
+
+
+def split_text_source(
+    source: Union[str, "os.PathLike[str]", mmap.mmap, BinaryIO, TextIO],
+    byte_length: int,
+    sentences: bool = False,
+) -> Generator[bytes, None, None]:
+    """
+    Lazily prepares and splits a text source into chunks, reading only as
+    much of it as is needed for the next chunk.
+
+    Args:
+        source (str, os.PathLike, mmap.mmap or file object): The text source.
+            Binary sources must be UTF-8 encoded.
+        byte_length (int): The maximum allowed byte length for any yielded chunk.
+        sentences (bool): Whether to also end a chunk after every sentence.
+
+    Yields:
+        bytes: Text chunks, as yielded by split_text_by_byte_length().
+    """
+    splitter = _TextSplitter(byte_length, sentences)
+    for block in _read_text_blocks(source):
+        yield from splitter.feed(_prepare_block(block))
+    yield from splitter.close()
+
+
+async def split_async_text_source(
+    source: AsyncIterable[str], byte_length: int, sentences: bool = False
+) -> AsyncGenerator[bytes, None]:
+    """
+    Lazily prepares and splits an asynchronous stream of text into chunks.
+
+    A stream of tokens, such as the output of a language model, can be split
+    with `sentences` set so that every sentence is yielded as soon as the
+    fragment that completes it is received.
+
+    Args:
+        source (AsyncIterable[str]): The stream of text.
+        byte_length (int): The maximum allowed byte length for any yielded chunk.
+        sentences (bool): Whether to also end a chunk after every sentence.
+
+    Yields:
+        bytes: Text chunks, as yielded by split_text_by_byte_length().
+    """
+    splitter = _TextSplitter(byte_length, sentences)
+    async for block in source:
+        if not isinstance(block, str):
+            raise TypeError("text must be an async iterable of str")
+        for chunk in splitter.feed(_prepare_block(block)):
+            yield chunk
+    for chunk in splitter.close():
+        yield chunk
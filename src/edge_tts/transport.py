@@ -0,0 +1,485 @@
+"""Transport module is used to carry the protocol of the service over a
+websocket client library. aiohttp is used by default, while websockets and
+wsproto can be used instead if they are installed."""
+
+# pylint: disable=import-outside-toplevel
+
+import asyncio
+import ssl
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from .exceptions import WebSocketError, WebSocketHandshakeError
+
+# Headers that the websocket client libraries set on their own.
+_HANDSHAKE_HEADERS = ("sec-websocket-protocol", "sec-websocket-version")
+
+# The subprotocol of the service.
+_SUBPROTOCOL = "synthesize"
+
+
+class WebSocket(ABC):
+    """
+    A websocket connection opened by a Transport.
+    """
+
+    @property
+    @abstractmethod
+    def closed(self) -> bool:
+        """
+        Whether the connection was closed or failed.
+
+        Returns:
+            bool: True if the connection cannot be used anymore.
+        """
+
+    @abstractmethod
+    async def send(self, data: str) -> None:
+        """
+        Sends a text message.
+
+        Args:
+            data (str): The message.
+        """
+
+    @abstractmethod
+    async def receive(self) -> Optional[Union[str, bytes]]:
+        """
+        Returns the next text or binary message.
+
+        Returns:
+            Optional[Union[str, bytes]]: The message, or None once the
+                connection was closed.
+
+        Raises:
+            WebSocketError: If the connection failed.
+        """
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Closes the connection."""
+
+
+class Transport(ABC):
+    """
+    Opens websocket connections to the service with a websocket client library.
+    A transport is created by a CommunicatePool with its connection settings.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        *,
+        connector: Optional[aiohttp.BaseConnector],
+        proxy: Optional[str],
+        connect_timeout: int,
+        receive_timeout: int,
+        ssl_ctx: ssl.SSLContext,
+    ) -> None:
+        if connector is not None:
+            raise ValueError("connector can only be used with the aiohttp transport")
+        self.proxy = proxy
+        self.connect_timeout = connect_timeout
+        self.receive_timeout = receive_timeout
+        self.ssl_ctx = ssl_ctx
+
+    @abstractmethod
+    async def open(self, url: str, headers: Dict[str, str]) -> WebSocket:
+        """
+        Opens a websocket connection.
+
+        Args:
+            url (str): The URL of the service.
+            headers (Dict[str, str]): The headers of the handshake.
+
+        Returns:
+            WebSocket: The connection.
+        """
+
+    def rejection(self, e: BaseException) -> Optional[Tuple[int, Optional[str]]]:
+        """
+        Returns the status and the Date header of the response if the given
+        exception was raised by open() because the handshake was rejected.
+
+        Args:
+            e (BaseException): The exception raised by open().
+
+        Returns:
+            Optional[Tuple[int, Optional[str]]]: The status and Date header, or
+                None if the exception is not a rejected handshake.
+        """
+        if isinstance(e, WebSocketHandshakeError):
+            # Header names are case-insensitive, and some libraries lower them.
+            date = (value for key, value in e.headers.items() if key.lower() == "date")
+            return e.status, next(date, None)
+        return None
+
+    async def close(self) -> None:
+        """Closes everything that the transport shares between connections."""
+
+
+class AiohttpWebSocket(WebSocket):
+    """
+    A websocket connection opened with aiohttp.
+    """
+
+    def __init__(self, websocket: aiohttp.ClientWebSocketResponse) -> None:
+        self.websocket = websocket
+
+    @property
+    def closed(self) -> bool:
+        return self.websocket.closed or self.websocket.exception() is not None
+
+    async def send(self, data: str) -> None:
+        await self.websocket.send_str(data)
+
+    async def receive(self) -> Optional[Union[str, bytes]]:
+        while True:
+            received = await self.websocket.receive()
+            if received.type in (aiohttp.WSMsgType.TEXT, aiohttp.WSMsgType.BINARY):
+                data: Union[str, bytes] = received.data
+                return data
+            if received.type == aiohttp.WSMsgType.ERROR:
+                raise WebSocketError(
+                    received.data if received.data else "Unknown error"
+                )
+            if received.type in (
+                aiohttp.WSMsgType.CLOSE,
+                aiohttp.WSMsgType.CLOSING,
+                aiohttp.WSMsgType.CLOSED,
+            ):
+                return None
+
+    async def close(self) -> None:
+        await self.websocket.close()
+
+
+class AiohttpTransport(Transport):
+    """
+    Opens websocket connections with aiohttp, over a session that is shared
+    by all of them.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        *,
+        connector: Optional[aiohttp.BaseConnector],
+        proxy: Optional[str],
+        connect_timeout: int,
+        receive_timeout: int,
+        ssl_ctx: ssl.SSLContext,
+    ) -> None:
+        super().__init__(
+            connector=None,
+            proxy=proxy,
+            connect_timeout=connect_timeout,
+            receive_timeout=receive_timeout,
+            ssl_ctx=ssl_ctx,
+        )
+        self.connector = connector
+        self.session_timeout = aiohttp.ClientTimeout(
+            total=None,
+            connect=None,
+            sock_connect=connect_timeout,
+            sock_read=receive_timeout,
+        )
+
+        # The session is created lazily so that it is bound to the event
+        # loop the transport is first used on.
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    async def open(self, url: str, headers: Dict[str, str]) -> WebSocket:
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=self.connector,
+                trust_env=True,
+                timeout=self.session_timeout,
+            )
+        websocket = await self.session.ws_connect(
+            url,
+            compress=15,
+            proxy=self.proxy,
+            headers=headers,
+            ssl=self.ssl_ctx,
+        )
+        return AiohttpWebSocket(websocket)
+
+    def rejection(self, e: BaseException) -> Optional[Tuple[int, Optional[str]]]:
+        if isinstance(e, aiohttp.ClientResponseError):
+            return e.status, e.headers.get("Date") if e.headers is not None else None
+        return super().rejection(e)
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class WebsocketsWebSocket(WebSocket):
+    """
+    A websocket connection opened with websockets.
+    """
+
+    def __init__(self, websocket: Any, receive_timeout: int) -> None:
+        self.websocket = websocket
+        self.receive_timeout = receive_timeout
+
+    @property
+    def closed(self) -> bool:
+        from websockets.protocol import State
+
+        return bool(self.websocket.state is not State.OPEN)
+
+    async def send(self, data: str) -> None:
+        from websockets.exceptions import ConnectionClosed
+
+        try:
+            await self.websocket.send(data)
+        except ConnectionClosed as e:
+            raise WebSocketError(str(e)) from e
+
+    async def receive(self) -> Optional[Union[str, bytes]]:
+        from websockets.exceptions import ConnectionClosedError, ConnectionClosedOK
+
+        try:
+            data: Union[str, bytes] = await asyncio.wait_for(
+                self.websocket.recv(), self.receive_timeout
+            )
+        except ConnectionClosedOK:
+            return None
+        except ConnectionClosedError as e:
+            raise WebSocketError(str(e)) from e
+        return data
+
+    async def close(self) -> None:
+        await self.websocket.close()
+
+
+class WebsocketsTransport(Transport):
+    """
+    Opens websocket connections with websockets, which must be installed.
+    """
+
+    async def open(self, url: str, headers: Dict[str, str]) -> WebSocket:
+        from websockets.asyncio.client import connect
+        from websockets.typing import Subprotocol
+
+        websocket = await connect(
+            url,
+            additional_headers={
+                key: value
+                for key, value in headers.items()
+                if key.lower() not in _HANDSHAKE_HEADERS + ("user-agent",)
+            },
+            user_agent_header=headers.get("User-Agent"),
+            subprotocols=[Subprotocol(_SUBPROTOCOL)],
+            compression="deflate",
+            open_timeout=self.connect_timeout,
+            ssl=self.ssl_ctx if url.startswith("wss:") else None,
+            proxy=self.proxy if self.proxy is not None else True,
+            max_size=None,
+        )
+        return WebsocketsWebSocket(websocket, self.receive_timeout)
+
+    def rejection(self, e: BaseException) -> Optional[Tuple[int, Optional[str]]]:
+        from websockets.exceptions import InvalidStatus
+
+        if isinstance(e, InvalidStatus):
+            return e.response.status_code, e.response.headers.get("Date")
+        return super().rejection(e)
+
+
+class WsprotoWebSocket(WebSocket):
+    """
+    A websocket connection opened with wsproto over an asyncio stream.
+    """
+
+    def __init__(
+        self,
+        connection: Any,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        receive_timeout: int,
+    ) -> None:
+        self.connection = connection
+        self.reader = reader
+        self.writer = writer
+        self.receive_timeout = receive_timeout
+
+        # The parts of the message being received.
+        self.text: List[str] = []
+        self.data = bytearray()
+
+    async def __read(self) -> bool:
+        """Reads from the stream, and returns False once it was closed."""
+        data = await asyncio.wait_for(self.reader.read(65536), self.receive_timeout)
+        self.connection.receive_data(data or None)
+        return bool(data)
+
+    async def handshake(self) -> None:
+        """
+        Waits for the response to the handshake.
+
+        Raises:
+            WebSocketHandshakeError: If the handshake was rejected.
+            WebSocketError: If the connection was closed during the handshake.
+        """
+        from wsproto.events import AcceptConnection, RejectConnection
+
+        while True:
+            received = await self.__read()
+            for event in self.connection.events():
+                if isinstance(event, AcceptConnection):
+                    return
+                if isinstance(event, RejectConnection):
+                    raise WebSocketHandshakeError(
+                        f"The handshake was rejected with status {event.status_code}",
+                        event.status_code,
+                        {
+                            key.decode("latin-1"): value.decode("latin-1")
+                            for key, value in event.headers
+                        },
+                    )
+            if not received:
+                raise WebSocketError("The connection was closed during the handshake.")
+
+    @property
+    def closed(self) -> bool:
+        from wsproto.connection import ConnectionState
+
+        return bool(self.connection.state is not ConnectionState.OPEN)
+
+    async def send(self, data: str) -> None:
+        from wsproto.events import TextMessage
+        from wsproto.utilities import LocalProtocolError
+
+        try:
+            self.writer.write(self.connection.send(TextMessage(data=data)))
+        except LocalProtocolError as e:
+            raise WebSocketError(str(e)) from e
+        await self.writer.drain()
+
+    async def receive(self) -> Optional[Union[str, bytes]]:
+        from wsproto.connection import ConnectionState
+        from wsproto.events import BytesMessage, CloseConnection, Ping, TextMessage
+
+        while True:
+            for event in self.connection.events():
+                if isinstance(event, TextMessage):
+                    self.text.append(event.data)
+                    if event.message_finished:
+                        text = "".join(self.text)
+                        self.text.clear()
+                        return text
+                elif isinstance(event, BytesMessage):
+                    if event.message_finished and not self.data:
+                        return bytes(event.data)
+                    self.data += event.data
+                    if event.message_finished:
+                        data = bytes(self.data)
+                        self.data.clear()
+                        return data
+                elif isinstance(event, Ping):
+                    self.writer.write(self.connection.send(event.response()))
+                elif isinstance(event, CloseConnection):
+                    if self.connection.state is ConnectionState.REMOTE_CLOSING:
+                        self.writer.write(self.connection.send(event.response()))
+                    return None
+
+            if self.connection.state is ConnectionState.CLOSED:
+                return None
+            if not await self.__read():
+                raise WebSocketError("The connection was closed unexpectedly.")
+
+    async def close(self) -> None:
+        from wsproto.connection import ConnectionState
+        from wsproto.events import CloseConnection
+
+        if self.connection.state is ConnectionState.OPEN:
+            self.writer.write(self.connection.send(CloseConnection(code=1000)))
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except OSError:
+            pass
+
+
+class WsprotoTransport(Transport):
+    """
+    Opens websocket connections with wsproto, which must be installed, over
+    plain asyncio streams. Proxies are not supported.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(
+        self,
+        *,
+        connector: Optional[aiohttp.BaseConnector],
+        proxy: Optional[str],
+        connect_timeout: int,
+        receive_timeout: int,
+        ssl_ctx: ssl.SSLContext,
+    ) -> None:
+        if proxy is not None:
+            raise ValueError("proxy cannot be used with the wsproto transport")
+        super().__init__(
+            connector=connector,
+            proxy=proxy,
+            connect_timeout=connect_timeout,
+            receive_timeout=receive_timeout,
+            ssl_ctx=ssl_ctx,
+        )
+
+    async def open(self, url: str, headers: Dict[str, str]) -> WebSocket:
+        from wsproto import ConnectionType, WSConnection
+        from wsproto.events import Request
+        from wsproto.extensions import PerMessageDeflate
+
+        parts = urlsplit(url)
+        secure = parts.scheme == "wss"
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection(
+                parts.hostname,
+                parts.port or (443 if secure else 80),
+                ssl=self.ssl_ctx if secure else None,
+            ),
+            self.connect_timeout,
+        )
+        websocket = WsprotoWebSocket(
+            WSConnection(ConnectionType.CLIENT), reader, writer, self.receive_timeout
+        )
+        try:
+            writer.write(
+                websocket.connection.send(
+                    Request(
+                        host=parts.netloc,
+                        target=(
+                            f"{parts.path}?{parts.query}" if parts.query else parts.path
+                        ),
+                        extra_headers=[
+                            (key.encode("latin-1"), value.encode("latin-1"))
+                            for key, value in headers.items()
+                            if key.lower() not in _HANDSHAKE_HEADERS
+                        ],
+                        subprotocols=[_SUBPROTOCOL],
+                        extensions=[PerMessageDeflate()],
+                    )
+                )
+            )
+            await asyncio.wait_for(websocket.handshake(), self.connect_timeout)
+        except BaseException:
+            writer.close()
+            raise
+        return websocket
+
+
+# The transports that can be chosen by name.
+TRANSPORTS: Dict[str, Type[Transport]] = {
+    "aiohttp": AiohttpTransport,
+    "websockets": WebsocketsTransport,
+    "wsproto": WsprotoTransport,
+}
@@ -2,19 +2,45 @@
 
 # pylint: disable=too-few-public-methods
 
-from typing import List
+import mmap
+import os  # pylint: disable=unused-import
+from typing import AsyncIterable, BinaryIO, List, TextIO, Union
 
-from typing_extensions import Literal, NotRequired, TypedDict
+from typing_extensions import Literal, NotRequired, Protocol, TypedDict
+
+# Text accepted by Communicate: the text itself, a path to a UTF-8 text file,
+# a file object or memory map of UTF-8 text, or an async iterable of text.
+TextSource = Union[
+    str, "os.PathLike[str]", mmap.mmap, BinaryIO, TextIO, AsyncIterable[str]
+]
 
 
 class TTSChunk(TypedDict):
     """TTS chunk data."""
 
-    type: Literal["audio", "WordBoundary", "SentenceBoundary"]
-    data: NotRequired[bytes]  # only for audio
-    duration: NotRequired[float]  # only for WordBoundary and SentenceBoundary
-    offset: NotRequired[float]  # only for WordBoundary and SentenceBoundary
+    type: Literal["audio", "WordBoundary", "SentenceBoundary", "TurnEnd"]
+    data: NotRequired[Union[bytes, memoryview]]  # only for audio, see audio_views
+    duration: NotRequired[float]  # only for WordBoundary, SentenceBoundary and TurnEnd
+    offset: NotRequired[float]  # only for WordBoundary, SentenceBoundary and TurnEnd
     text: NotRequired[str]  # only for WordBoundary and SentenceBoundary
+    speaker: NotRequired[str]  # only for WordBoundary and SentenceBoundary of dialogues
+
+
+class AudioWriter(Protocol):
+    """
+    Anything audio can be written into by Communicate.stream_into(), such as
+    a binary file or a ring buffer. The write method may be a coroutine.
+    """
+
+    def write(self, __data: Union[bytes, memoryview]) -> object:
+        """Writes the audio data, which the writer must copy to keep it."""
+
+
+class BatchResult(TypedDict):
+    """Audio and boundaries of a single item of Communicate.batch()."""
+
+    audio: bytes
+    cues: List[TTSChunk]  # offsets are relative to the start of the audio
 
 
 class VoiceTag(TypedDict):
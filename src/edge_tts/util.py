@@ -2,14 +2,21 @@
 
 import argparse
 import asyncio
+import os
 import sys
 from typing import Optional, TextIO
 
 from tabulate import tabulate
 
 from . import Communicate, SubMaker, list_voices
-from .constants import DEFAULT_VOICE
+from .constants import (
+    DEFAULT_OUTPUT_FORMAT,
+    DEFAULT_VOICE,
+    EXTENSION_OUTPUT_FORMATS,
+    OUTPUT_FORMATS,
+)
 from .data_classes import UtilArgs
+from .typing import TextSource
 
 
 async def _print_voices(*, proxy: Optional[str]) -> None:
@@ -29,7 +36,17 @@ async def _print_voices(*, proxy: Optional[str]) -> None:
     print(tabulate(table, headers))
 
 
-async def _run_tts(args: UtilArgs) -> None:
+def _output_format(args: UtilArgs) -> str:
+    """Returns the output format, which defaults to the one matching the
+    extension of the media file."""
+    if args.output_format is not None:
+        return args.output_format
+
+    extension = os.path.splitext(args.write_media or "")[1].lower()
+    return EXTENSION_OUTPUT_FORMATS.get(extension, DEFAULT_OUTPUT_FORMAT)
+
+
+async def _run_tts(args: UtilArgs, text: TextSource) -> None:
     """Run TTS after parsing arguments from command line."""
 
     try:
@@ -47,13 +64,25 @@ async def _run_tts(args: UtilArgs) -> None:
         return
 
     communicate = Communicate(
-        args.text,
+        text,
         args.voice,
         rate=args.rate,
         volume=args.volume,
         pitch=args.pitch,
+        # The boundaries are only needed for the subtitles.
+        boundary="SentenceBoundary" if args.write_subtitles is not None else None,
         proxy=args.proxy,
+        output_format=_output_format(args),
     )
+    if args.write_media not in (None, "-") and not args.write_media.lower().endswith(
+        communicate.file_extension
+    ):
+        print(
+            f"Warning: the media file will hold {communicate.tts_config.output_format} "
+            f"audio, which is usually saved with the {communicate.file_extension} "
+            "extension.",
+            file=sys.stderr,
+        )
     submaker = SubMaker()
     try:
         audio_file = (
@@ -114,6 +143,14 @@ async def amain() -> None:
         "--write-subtitles",
         help="send subtitle output to provided file instead of stderr",
     )
+    parser.add_argument(
+        "--output-format",
+        help="set the audio format, one of: "
+        f"{', '.join(OUTPUT_FORMATS)}. Default: the format matching the "
+        f"extension of --write-media, or {DEFAULT_OUTPUT_FORMAT}.",
+        choices=list(OUTPUT_FORMATS),
+        metavar="FORMAT",
+    )
     parser.add_argument("--proxy", help="use a proxy for TTS and voice list.")
     args = parser.parse_args(namespace=UtilArgs())
 
@@ -121,15 +158,15 @@ async def amain() -> None:
         await _print_voices(proxy=args.proxy)
         sys.exit(0)
 
-    if args.file is not None:
-        if args.file in ("-", "/dev/stdin"):
-            args.text = sys.stdin.read()
-        else:
-            with open(args.file, encoding="utf-8") as file:
-                args.text = file.read()
-
-    if args.text is not None:
-        await _run_tts(args)
+    # The file is opened before any output file is, so that a missing file
+    # does not truncate them, and is read lazily while it is synthesized.
+    if args.file in ("-", "/dev/stdin"):
+        await _run_tts(args, sys.stdin)
+    elif args.file is not None:
+        with open(args.file, "rb") as file:
+            await _run_tts(args, file)
+    elif args.text is not None:
+        await _run_tts(args, args.text)
 
 
 def main() -> None:
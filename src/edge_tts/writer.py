@@ -0,0 +1,226 @@
+"""Writer module is used to write files from the event loop without blocking it
+on the disk."""
+
+import asyncio
+import inspect
+import json
+import os
+import stat
+import uuid
+from contextlib import AsyncExitStack
+from typing import AsyncGenerator, Awaitable, BinaryIO, Callable, Optional, Union
+
+from .typing import AudioWriter, TTSChunk
+
+
+class FileWriter:
+    """
+    An AudioWriter that writes a file without blocking the event loop.
+
+    Writes are collected into a buffer, which is written out by a worker
+    thread once it holds `buffer_size` bytes. The next buffer is collected in
+    the meantime, but it is only handed over once the previous one has been
+    written, so a stream is slowed down to the speed of the disk instead of
+    buffering without limit.
+
+    If the destination is missing or a regular file, the data is written to
+    a temporary file next to it, which is synced to disk and renamed over it
+    once the writer is exited without an exception, so the destination is
+    never left with a partial file. Otherwise the temporary file is removed.
+    A symlink is followed to the file it points to, and the mode of an
+    existing file is kept. Other destinations, such as pipes or devices like
+    /dev/stdout, are written to directly.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, bytes, "os.PathLike[str]"],
+        buffer_size: int = 1024 * 1024,
+    ) -> None:
+        # Validate the path parameter.
+        if not isinstance(path, (str, bytes, os.PathLike)):
+            raise TypeError("path must be str, bytes or os.PathLike")
+        self.path = os.fsdecode(path)
+
+        # The temporary file, which is only used for regular files.
+        self.temp_path: Optional[str] = None
+
+        # Validate the buffer_size parameter.
+        if not isinstance(buffer_size, int):
+            raise TypeError("buffer_size must be int")
+        if buffer_size <= 0:
+            raise ValueError("buffer_size must be greater than 0")
+        self.buffer_size = buffer_size
+
+        self.buffer = bytearray()
+        self.file: Optional[BinaryIO] = None
+        self.writing: Optional["asyncio.Future[int]"] = None
+
+    def write(self, data: Union[bytes, memoryview]) -> Optional[Awaitable[None]]:
+        """
+        Adds data to the buffer.
+
+        Args:
+            data (Union[bytes, memoryview]): The data to write.
+
+        Returns:
+            Optional[Awaitable[None]]: None, or an awaitable that must be
+                awaited before writing more data if the buffer is full.
+        """
+        self.buffer += data
+        if len(self.buffer) >= self.buffer_size:
+            return self.flush()
+        return None
+
+    async def flush(self) -> None:
+        """
+        Hands the buffer to the worker thread, once the previous buffer has
+        been written.
+        """
+        if self.file is None:
+            raise RuntimeError("FileWriter is not open.")
+
+        writing, self.writing = self.writing, None
+        if writing is not None:
+            await writing
+
+        if self.buffer:
+            buffer, self.buffer = self.buffer, bytearray()
+            self.writing = asyncio.get_running_loop().run_in_executor(
+                None, self.file.write, buffer
+            )
+
+    def __open(self) -> BinaryIO:
+        """Opens the temporary file, or the destination if it is not a file."""
+        try:
+            mode: Optional[int] = os.stat(self.path).st_mode
+        except FileNotFoundError:
+            mode = None
+        if mode is not None and not stat.S_ISREG(mode):
+            return open(self.path, "wb")
+
+        # Replace the file a symlink points to instead of the symlink itself.
+        self.path = os.path.realpath(self.path)
+        directory, name = os.path.split(self.path)
+        temp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex}.tmp")
+        file = open(temp_path, "xb")
+        if mode is not None:
+            try:
+                os.chmod(temp_path, stat.S_IMODE(mode))
+            except BaseException:
+                file.close()
+                os.remove(temp_path)
+                raise
+        self.temp_path = temp_path
+        return file
+
+    def __commit(self) -> None:
+        """Syncs the temporary file to disk and renames it to the destination."""
+        assert self.file is not None
+        if self.temp_path is None:
+            self.file.close()
+            return
+
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+
+    def __abort(self) -> None:
+        """Closes the file, and removes it if it is the temporary file."""
+        assert self.file is not None
+        self.file.close()
+        if self.temp_path is not None:
+            os.remove(self.temp_path)
+
+    async def __aenter__(self) -> "FileWriter":
+        loop = asyncio.get_running_loop()
+        self.file = await loop.run_in_executor(None, self.__open)
+        return self
+
+    async def __aexit__(self, exc_type: Optional[type], *args: object) -> None:
+        loop = asyncio.get_running_loop()
+        if exc_type is None:
+            try:
+                # Hand over the rest of the buffer, and wait for it to be written.
+                await self.flush()
+                await self.flush()
+                await loop.run_in_executor(None, self.__commit)
+                return
+            except BaseException:
+                await loop.run_in_executor(None, self.__abort)
+                raise
+
+        # Wait for the buffer being written before removing the file.
+        if self.writing is not None:
+            await asyncio.wait([self.writing])
+        await loop.run_in_executor(None, self.__abort)
+
+
+async def write_stream(
+    messages: AsyncGenerator[TTSChunk, None],
+    writer: AudioWriter,
+    on_boundary: Optional[Callable[[TTSChunk], object]] = None,
+) -> int:
+    """
+    Writes the audio of a stream into a writer, and hands every WordBoundary
+    and SentenceBoundary to on_boundary, in order with the audio. The results
+    of both are awaited if they are awaitable. The stream is closed as soon as
+    writing stops.
+
+    Args:
+        messages (AsyncGenerator[TTSChunk, None]): The stream.
+        writer (AudioWriter): The writer of the audio, such as a binary file.
+        on_boundary (Optional[Callable[[TTSChunk], object]]): Called with
+            every boundary.
+
+    Returns:
+        int: The number of bytes of audio written.
+    """
+    written = 0
+    try:
+        async for message in messages:
+            if message["type"] == "audio":
+                result = writer.write(message["data"])
+                if inspect.isawaitable(result):
+                    await result
+                written += len(message["data"])
+            elif on_boundary is not None and message["type"] in (
+                "WordBoundary",
+                "SentenceBoundary",
+            ):
+                result = on_boundary(message)
+                if inspect.isawaitable(result):
+                    await result
+    finally:
+        await messages.aclose()
+    return written
+
+
+async def save_stream(
+    messages: AsyncGenerator[TTSChunk, None],
+    audio_fname: Union[str, bytes],
+    metadata_fname: Optional[Union[str, bytes]] = None,
+) -> None:
+    """
+    Saves the audio of a stream to a file, and its boundaries to another one
+    as JSON lines, both with a FileWriter.
+
+    Args:
+        messages (AsyncGenerator[TTSChunk, None]): The stream.
+        audio_fname (Union[str, bytes]): The file to save the audio to.
+        metadata_fname (Optional[Union[str, bytes]]): The file to save the
+            boundaries to, if any.
+    """
+    async with AsyncExitStack() as stack:
+        audio = await stack.enter_async_context(FileWriter(audio_fname))
+        if metadata_fname is None:
+            await write_stream(messages, audio)
+            return
+
+        metadata = await stack.enter_async_context(FileWriter(metadata_fname))
+
+        def write_boundary(message: TTSChunk) -> Optional[Awaitable[None]]:
+            return metadata.write(json.dumps(message).encode("utf-8") + b"\n")
+
+        await write_stream(messages, audio, write_boundary)
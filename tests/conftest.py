@@ -0,0 +1,128 @@
+"""Fixtures shared by the tests, most notably a fake transport that answers
+like the service without a network."""
+
+import asyncio
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional, Type, Union
+
+import pytest
+
+from edge_tts import Communicate
+from edge_tts.transport import Transport, WebSocket
+from edge_tts.typing import TTSChunk
+
+# A silent MPEG-2 Layer III frame at 24 kHz and 48 kbit/s, like the audio of
+# the default output format. It holds 576 samples, which last 24 ms.
+FRAME = bytes([0xFF, 0xF3, 0x64, 0xC4]) + bytes(140)
+FRAME_TICKS = 240_000
+
+# The seconds it takes to open a connection to the fake service.
+OPEN_TIME = 0.01
+
+
+def text_message(path: str, body: str) -> str:
+    """Returns a text message as the service sends it."""
+    return (
+        "X-RequestId:0\r\nContent-Type:application/json; charset=utf-8\r\n"
+        f"Path:{path}\r\n\r\n{body}"
+    )
+
+
+def binary_message(data: bytes, content_type: Optional[str] = "audio/mpeg") -> bytes:
+    """Returns a binary message as the service sends it."""
+    headers = b"X-RequestId:0\r\nPath:audio\r\n"
+    if content_type is not None:
+        headers += b"Content-Type:" + content_type.encode("utf-8") + b"\r\n"
+    return len(headers).to_bytes(2, "big") + headers + data
+
+
+async def collect(communicate: Communicate) -> List[TTSChunk]:
+    """Returns every message of the stream of the given Communicate."""
+    return [message async for message in communicate.stream()]
+
+
+class FakeWebSocket(WebSocket):
+    """
+    A connection to a fake service, which answers every turn with one frame of
+    audio per word of the text, and one boundary per word spanning its frame
+    if boundaries are enabled.
+    """
+
+    def __init__(self) -> None:
+        self.speech_config: Optional[Dict[str, Any]] = None
+        self.turns = 0
+        self.messages: "asyncio.Queue[Optional[Union[str, bytes]]]" = asyncio.Queue()
+        self.is_closed = False
+
+    @property
+    def closed(self) -> bool:
+        return self.is_closed
+
+    def __boundary_type(self) -> Optional[str]:
+        assert self.speech_config is not None
+        synthesis = self.speech_config["context"]["synthesis"]
+        options = synthesis["audio"]["metadataoptions"]
+        if options["wordBoundaryEnabled"] == "true":
+            return "WordBoundary"
+        if options["sentenceBoundaryEnabled"] == "true":
+            return "SentenceBoundary"
+        return None
+
+    async def send(self, data: str) -> None:
+        headers, _, body = data.partition("\r\n\r\n")
+        path = re.search(r"Path:(\S+)", headers)
+        assert path is not None
+        if path.group(1) == "speech.config":
+            self.speech_config = json.loads(body)
+            return
+
+        assert path.group(1) == "ssml" and self.speech_config is not None
+        self.turns += 1
+        text = re.search(r"<prosody[^>]*>(.*)</prosody>", body, re.S)
+        assert text is not None
+        boundary_type = self.__boundary_type()
+        self.messages.put_nowait(text_message("turn.start", "{}"))
+        for i, word in enumerate(text.group(1).split()):
+            if boundary_type is not None:
+                boundary = {
+                    "Type": boundary_type,
+                    "Data": {
+                        "Offset": i * FRAME_TICKS,
+                        "Duration": FRAME_TICKS,
+                        "text": {"Text": word, "Length": len(word)},
+                    },
+                }
+                metadata = json.dumps({"Metadata": [boundary]})
+                self.messages.put_nowait(text_message("audio.metadata", metadata))
+            self.messages.put_nowait(binary_message(FRAME))
+        self.messages.put_nowait(binary_message(b"", None))
+        self.messages.put_nowait(text_message("turn.end", "{}"))
+
+    async def receive(self) -> Optional[Union[str, bytes]]:
+        if self.is_closed:
+            return None
+        return await self.messages.get()
+
+    async def close(self) -> None:
+        self.is_closed = True
+
+
+class FakeTransport(Transport):
+    """A transport that opens connections to the fake service."""
+
+    # Every connection opened by any FakeTransport, in order.
+    opened: List[FakeWebSocket] = []
+
+    async def open(self, url: str, headers: Dict[str, str]) -> WebSocket:
+        await asyncio.sleep(OPEN_TIME)
+        websocket = FakeWebSocket()
+        FakeTransport.opened.append(websocket)
+        return websocket
+
+
+@pytest.fixture(name="transport")
+def fixture_transport() -> Iterator[Type[FakeTransport]]:
+    """The fake transport, with no connections opened yet."""
+    FakeTransport.opened = []
+    yield FakeTransport
@@ -0,0 +1,94 @@
+"""Tests of the measurement of the duration of audio."""
+
+from typing import Optional, Tuple
+
+import pytest
+from conftest import FRAME, FRAME_TICKS
+
+from edge_tts.audio import (
+    MP3DurationCounter,
+    PCMDurationCounter,
+    duration_counter,
+    parse_mpeg_frame_header,
+)
+
+# An MPEG-1 Layer III frame at 44.1 kHz and 128 kbit/s, without padding.
+MPEG1_FRAME = bytes([0xFF, 0xFB, 0x90, 0x00]) + bytes(413)
+MPEG1_FRAME_TICKS = 1152 * 10_000_000 // 44100
+
+
+@pytest.mark.parametrize(
+    "header, frame",
+    [
+        (FRAME[:4], (144, 576, 24000)),
+        (bytes([0xFF, 0xF3, 0x66, 0xC4]), (145, 576, 24000)),
+        (MPEG1_FRAME[:4], (417, 1152, 44100)),
+        (bytes([0xFF, 0xFB, 0x92, 0x00]), (418, 1152, 44100)),
+        (bytes([0xFF, 0xFD, 0x90, 0x00]), (522, 1152, 44100)),
+        (bytes([0xFF, 0xFF, 0x90, 0x00]), (312, 384, 44100)),
+        (bytes([0xFF, 0xE3, 0x64, 0xC4]), (288, 576, 12000)),
+    ],
+)
+def test_frame_header(header: bytes, frame: Tuple[int, int, int]) -> None:
+    assert parse_mpeg_frame_header(header) == frame
+    assert parse_mpeg_frame_header(memoryview(header)) == frame
+
+
+@pytest.mark.parametrize(
+    "header",
+    [
+        b"",
+        FRAME[:3],
+        bytes(4),
+        b"ID3\x04",
+        # Reserved version, reserved layer, free and bad bitrates, reserved
+        # sample rate.
+        bytes([0xFF, 0xEB, 0x64, 0xC4]),
+        bytes([0xFF, 0xF1, 0x64, 0xC4]),
+        bytes([0xFF, 0xF3, 0x04, 0xC4]),
+        bytes([0xFF, 0xF3, 0xF4, 0xC4]),
+        bytes([0xFF, 0xF3, 0x6C, 0xC4]),
+    ],
+)
+def test_invalid_frame_header(header: bytes) -> None:
+    assert parse_mpeg_frame_header(header) is None
+
+
+def measure(data: bytes, piece_length: Optional[int] = None) -> int:
+    """Feeds the data to an MP3 counter in pieces, and returns its duration."""
+    counter = MP3DurationCounter()
+    piece_length = piece_length or len(data) or 1
+    for start in range(0, len(data), piece_length):
+        counter.feed(data[start : start + piece_length])
+    return counter.duration
+
+
+@pytest.mark.parametrize("piece_length", [None, 1, 3, 100, 145])
+def test_mp3_duration(piece_length: Optional[int]) -> None:
+    assert measure(FRAME * 5, piece_length) == 5 * FRAME_TICKS
+
+
+@pytest.mark.parametrize("piece_length", [None, 1, 7])
+def test_mp3_duration_skips_garbage(piece_length: Optional[int]) -> None:
+    data = bytes(10) + FRAME * 2 + b"\xff\x00garbage" + FRAME + bytes(3)
+    assert measure(data, piece_length) == 3 * FRAME_TICKS
+
+
+def test_mp3_duration_across_sample_rates() -> None:
+    data = MPEG1_FRAME * 2 + FRAME * 3
+    assert measure(data) == 2 * MPEG1_FRAME_TICKS + 3 * FRAME_TICKS
+    assert measure(data, 50) == 2 * MPEG1_FRAME_TICKS + 3 * FRAME_TICKS
+
+
+def test_pcm_duration() -> None:
+    counter = duration_counter("raw-24khz-16bit-mono-pcm")
+    assert isinstance(counter, PCMDurationCounter)
+    counter.feed(bytes(24000))
+    counter.feed(memoryview(bytes(24000)))
+    assert counter.duration == 10_000_000
+
+
+def test_unmeasured_duration() -> None:
+    counter = duration_counter("webm-24khz-16bit-mono-opus")
+    counter.feed(FRAME)
+    assert counter.duration == 0
@@ -0,0 +1,108 @@
+"""Tests of the packing of short texts into turns, and of splitting the audio
+and boundaries of a turn back out per text."""
+
+import asyncio
+from typing import Dict, List, Sequence, Tuple, Type
+
+import pytest
+from conftest import FRAME, FRAME_TICKS, FakeTransport
+
+from edge_tts import Communicate, CommunicatePool
+from edge_tts.audio import split_mp3
+from edge_tts.batch import pack_items, split_batch, terminate_sentence
+from edge_tts.typing import BatchResult, TTSChunk
+
+
+@pytest.mark.parametrize(
+    "cuts, pieces",
+    [
+        ([], [(5, 0)]),
+        ([2 * FRAME_TICKS], [(2, 0), (3, 2)]),
+        # The frame boundary closest to a cut is used, the earlier one on a tie.
+        ([FRAME_TICKS * 14 // 10, FRAME_TICKS * 36 // 10], [(1, 0), (3, 1), (1, 4)]),
+        ([FRAME_TICKS * 3 // 2], [(1, 0), (4, 1)]),
+        # Cuts never go backwards, or past the end of the audio.
+        ([3 * FRAME_TICKS, FRAME_TICKS], [(3, 0), (0, 3), (2, 3)]),
+        ([10 * FRAME_TICKS], [(5, 0), (0, 5)]),
+    ],
+)
+def test_split_mp3(cuts: Sequence[int], pieces: List[Tuple[int, int]]) -> None:
+    assert split_mp3(FRAME * 5, cuts) == [
+        (FRAME * frames, start * FRAME_TICKS) for frames, start in pieces
+    ]
+
+
+def test_split_mp3_keeps_garbage_with_frame_after() -> None:
+    data = bytes(3) + FRAME + bytes(2) + FRAME
+    assert split_mp3(data, [FRAME_TICKS]) == [
+        (bytes(3) + FRAME, 0),
+        (bytes(2) + FRAME, FRAME_TICKS),
+    ]
+
+
+def test_terminate_sentence() -> None:
+    assert terminate_sentence(" Hello ") == "Hello."
+    assert terminate_sentence("Hello?") == "Hello?"
+    assert terminate_sentence('He said "Hi."') == 'He said "Hi."'
+    assert terminate_sentence("你好。") == "你好。"
+    assert terminate_sentence(" ") == ""
+
+
+def test_pack_items() -> None:
+    items = [(1, "aaaa."), (2, "bbbb."), (3, "cccccccccccc."), (4, "d.")]
+    assert list(pack_items(items, 11)) == [
+        [(1, "aaaa."), (2, "bbbb.")],
+        [(3, "cccccccccccc.")],
+        [(4, "d.")],
+    ]
+
+
+def boundary(text: str, offset: int) -> TTSChunk:
+    """Returns a boundary of one frame at the given frame."""
+    return {
+        "type": "WordBoundary",
+        "offset": offset * FRAME_TICKS,
+        "duration": FRAME_TICKS,
+        "text": text,
+    }
+
+
+def test_split_batch() -> None:
+    # The second text starts after a frame of silence.
+    messages: List[TTSChunk] = [
+        boundary("One.", 0),
+        {"type": "audio", "data": FRAME * 2},
+        boundary("Two", 2),
+        boundary("three.", 3),
+        {"type": "audio", "data": FRAME * 2},
+    ]
+    results = split_batch(["", "One.", "Two three."], messages)
+    assert results[0]["audio"] == b"" and not results[0]["cues"]
+    assert results[1]["audio"] == FRAME
+    assert results[2]["audio"] == FRAME * 3
+    assert [(c["text"], c["offset"]) for c in results[1]["cues"]] == [("One.", 0)]
+    assert [(c["text"], c["offset"]) for c in results[2]["cues"]] == [
+        ("Two", FRAME_TICKS),
+        ("three.", 2 * FRAME_TICKS),
+    ]
+
+
+def test_batch(transport: Type[FakeTransport]) -> None:
+    async def main() -> Dict[str, BatchResult]:
+        async with CommunicatePool(1, transport=transport) as pool:
+            return await Communicate.batch(
+                {"a": "One two", "b": "Three", "c": "Four five six?"}, pool=pool
+            )
+
+    results = asyncio.run(main())
+    assert list(results) == ["a", "b", "c"]
+    assert [results[key]["audio"] for key in results] == [FRAME * 2, FRAME, FRAME * 3]
+    assert [
+        [(c["text"], c["offset"]) for c in results[key]["cues"]] for key in results
+    ] == [
+        [("One", 0), ("two.", FRAME_TICKS)],
+        [("Three.", 0)],
+        [("Four", 0), ("five", FRAME_TICKS), ("six?", 2 * FRAME_TICKS)],
+    ]
+    # All of the texts were synthesized in a single turn.
+    assert sum(websocket.turns for websocket in transport.opened) == 1
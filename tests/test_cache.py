@@ -0,0 +1,176 @@
+"""Tests of the caches and of the keys turns are cached and shared under."""
+
+import asyncio
+from pathlib import Path
+from typing import List, Optional, Type
+
+from conftest import FRAME, FakeTransport, collect
+
+from edge_tts import Communicate, CommunicatePool, FileCache, MemoryCache
+from edge_tts.cache import Cache, cache_key
+from edge_tts.protocol import mkssml, speech_config_data
+from edge_tts.typing import TTSChunk
+
+
+def audio_types(messages: List[TTSChunk]) -> List[type]:
+    """Returns the types of the audio data of the given messages."""
+    return [type(message["data"]) for message in messages if message["type"] == "audio"]
+
+
+def run_twice(transport: Type[FakeTransport], cache: Cache) -> List[List[TTSChunk]]:
+    """Streams the same text twice over the same pool and cache."""
+
+    async def main() -> List[List[TTSChunk]]:
+        async with CommunicatePool(1, transport=transport) as pool:
+            return [
+                await collect(Communicate("Hello world", pool=pool, cache=cache))
+                for _ in range(2)
+            ]
+
+    return asyncio.run(main())
+
+
+def test_key_covers_boundary_and_text() -> None:
+    def key(text: str, boundary: Optional[str]) -> str:
+        tts_config = Communicate(text, boundary=boundary).tts_config  # type: ignore
+        return cache_key(
+            speech_config_data(tts_config), mkssml(tts_config, text.encode("utf-8"))
+        )
+
+    assert key("Hello", "WordBoundary") == key("Hello", "WordBoundary")
+    assert key("Hello", "WordBoundary") != key("Hello", "SentenceBoundary")
+    assert key("Hello", "WordBoundary") != key("Hello", None)
+    assert key("Hello", "WordBoundary") != key("Goodbye", "WordBoundary")
+
+
+def test_file_cache_replays_turn(
+    transport: Type[FakeTransport], tmp_path: Path
+) -> None:
+    cache = FileCache(tmp_path)
+    first, second = run_twice(transport, cache)
+    assert first == second
+    assert audio_types(second) == [bytes, bytes]
+    assert sum(websocket.turns for websocket in transport.opened) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # The entry is found again by a new instance, as by another process.
+    cache = FileCache(tmp_path)
+    assert run_twice(transport, cache) == [first, first]
+    assert (cache.hits, cache.misses) == (2, 0)
+
+
+def test_file_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    audio: List[TTSChunk] = [{"type": "audio", "data": bytes(100)}]
+    cache = FileCache(tmp_path, max_size=400)
+    for key in ("a", "b", "c"):
+        cache.put(key, audio)
+    assert cache.get("a") is not None
+    cache.put("d", audio)
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ("a", "c", "d"))
+    assert cache.size <= 400
+
+
+def test_memory_cache_replays_turn(transport: Type[FakeTransport]) -> None:
+    cache = MemoryCache()
+    first, second = run_twice(transport, cache)
+    assert first == second
+    assert sum(websocket.turns for websocket in transport.opened) == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_memory_cache_collapses_concurrent_misses(
+    transport: Type[FakeTransport],
+) -> None:
+    async def main() -> List[List[TTSChunk]]:
+        cache = MemoryCache()
+        async with CommunicatePool(4, transport=transport) as pool:
+            return list(
+                await asyncio.gather(
+                    *(
+                        collect(Communicate("Hello world", pool=pool, cache=cache))
+                        for _ in range(4)
+                    )
+                )
+            )
+
+    results = asyncio.run(main())
+    assert all(result == results[0] for result in results)
+    assert sum(websocket.turns for websocket in transport.opened) == 1
+
+
+def test_memory_cache_drops_least_recently_used() -> None:
+    audio: List[TTSChunk] = [{"type": "audio", "data": bytes(100)}]
+    cache = MemoryCache(max_size=300)
+    for key in ("a", "b", "c"):
+        cache.put(key, audio)
+    assert cache.get("a") is not None
+    cache.put("d", audio)
+    assert cache.get("b") is None
+    assert all(cache.get(key) is not None for key in ("a", "c", "d"))
+    assert cache.size == 300
+
+
+def test_pools_sharing_cache_collapse_concurrent_misses(
+    transport: Type[FakeTransport],
+) -> None:
+    async def main() -> List[List[TTSChunk]]:
+        cache = MemoryCache()
+        async with CommunicatePool(1, transport=transport) as first_pool:
+            async with CommunicatePool(1, transport=transport) as second_pool:
+                return list(
+                    await asyncio.gather(
+                        *(
+                            collect(Communicate("Hello world", pool=pool, cache=cache))
+                            for pool in (first_pool, second_pool) * 3
+                        )
+                    )
+                )
+
+    results = asyncio.run(main())
+    assert all(result == results[0] for result in results)
+    assert sum(websocket.turns for websocket in transport.opened) == 1
+
+
+def test_views_are_not_replayed_from_cache(transport: Type[FakeTransport]) -> None:
+    async def main() -> List[List[TTSChunk]]:
+        cache = MemoryCache()
+        async with CommunicatePool(1, transport=transport) as pool:
+            return [
+                await collect(
+                    Communicate(
+                        "Hello world", pool=pool, cache=cache, audio_views=views
+                    )
+                )
+                for views in (True, False)
+            ]
+
+    views, plain = asyncio.run(main())
+    assert audio_types(views) == [memoryview, memoryview]
+    assert audio_types(plain) == [bytes, bytes]
+
+
+def test_views_are_not_shared_by_flight(transport: Type[FakeTransport]) -> None:
+    async def main() -> List[List[TTSChunk]]:
+        async with CommunicatePool(2, transport=transport) as pool:
+            return list(
+                await asyncio.gather(
+                    collect(Communicate("Hello world", pool=pool, audio_views=True)),
+                    collect(Communicate("Hello world", pool=pool)),
+                )
+            )
+
+    views, plain = asyncio.run(main())
+    assert sum(websocket.turns for websocket in transport.opened) == 1
+    assert audio_types(views) == [memoryview, memoryview]
+    assert audio_types(plain) == [bytes, bytes]
+    assert [
+        bytes(message["data"]) for message in views if message["type"] == "audio"
+    ] == [message["data"] for message in plain if message["type"] == "audio"]
+    # The views are views of the received messages, not of copies.
+    for message in views:
+        if message["type"] == "audio":
+            data = message["data"]
+            assert isinstance(data, memoryview)
+            assert data == FRAME
+            assert isinstance(data.obj, bytes) and len(data.obj) > len(FRAME)
@@ -0,0 +1,64 @@
+"""Tests of the synchronous client, over the fake service."""
+
+import asyncio
+import threading
+from typing import Dict, List, Type
+
+import pytest
+from conftest import FRAME, FakeTransport
+
+from edge_tts import SyncClient
+from edge_tts.transport import WebSocket
+
+
+class HangingTransport(FakeTransport):
+    """A transport whose connections never open."""
+
+    async def open(self, url: str, headers: Dict[str, str]) -> WebSocket:
+        await asyncio.Event().wait()
+        raise AssertionError("unreachable")
+
+
+def test_synthesize(transport: Type[FakeTransport]) -> None:
+    with SyncClient(transport=transport) as client:
+        assert client.synthesize("Hello world") == FRAME * 2
+        assert [message["type"] for message in client.stream("Hello")] == [
+            "SentenceBoundary",
+            "audio",
+            "TurnEnd",
+        ]
+    assert len(transport.opened) == 1
+
+
+def test_closed(transport: Type[FakeTransport]) -> None:
+    client = SyncClient(transport=transport)
+    client.close()
+    client.close()
+    with pytest.raises(RuntimeError, match="closed"):
+        client.synthesize("Hello")
+    with pytest.raises(RuntimeError, match="closed"):
+        list(client.stream("Hello"))
+    client.close()
+    assert not transport.opened
+
+
+def test_close_while_synthesizing() -> None:
+    client = SyncClient(transport=HangingTransport)
+    errors: List[BaseException] = []
+
+    def synthesize() -> None:
+        try:
+            client.synthesize("Hello")
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=synthesize) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    client.runner.run(asyncio.sleep(0.05))
+    client.close()
+    for thread in threads:
+        thread.join(1)
+        assert not thread.is_alive()
+    assert len(errors) == 2
+    assert client.pool.closed
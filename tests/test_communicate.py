@@ -0,0 +1,101 @@
+"""Tests of the messages streamed by Communicate."""
+
+import asyncio
+from typing import Any, List, Type, Union
+
+from conftest import FRAME, FRAME_TICKS, FakeTransport, collect
+
+from edge_tts import Communicate, CommunicatePool
+from edge_tts.typing import TTSChunk
+
+
+def stream(transport: Type[FakeTransport], text: str, **kwargs: Any) -> List[TTSChunk]:
+    """Streams the given text over the fake transport."""
+
+    async def main() -> List[TTSChunk]:
+        async with CommunicatePool(1, transport=transport) as pool:
+            return await collect(Communicate(text, pool=pool, **kwargs))
+
+    return asyncio.run(main())
+
+
+def audio(messages: List[TTSChunk]) -> List[bytes]:
+    """Returns the audio data of the given messages."""
+    return [bytes(m["data"]) for m in messages if m["type"] == "audio"]
+
+
+def test_coalesce_bytes(transport: Type[FakeTransport]) -> None:
+    messages = stream(
+        transport, "one two three four five", boundary=None, coalesce_bytes=300
+    )
+    assert audio(messages) == [FRAME * 3, FRAME * 2]
+    assert all(type(m["data"]) is bytes for m in messages if m["type"] == "audio")
+
+
+def test_coalesce_ms_with_views(transport: Type[FakeTransport]) -> None:
+    messages = stream(
+        transport,
+        "one two three four five",
+        boundary=None,
+        coalesce_ms=48,
+        audio_views=True,
+    )
+    assert audio(messages) == [FRAME * 2, FRAME * 2, FRAME]
+    assert all(
+        isinstance(m["data"], memoryview) for m in messages if m["type"] == "audio"
+    )
+
+
+def test_coalesced_audio_ends_before_boundaries(
+    transport: Type[FakeTransport],
+) -> None:
+    messages = stream(
+        transport, "one two three", boundary="WordBoundary", coalesce_bytes=1000
+    )
+    # The audio after every boundary is yielded before the next boundary.
+    assert [m["type"] for m in messages] == ["WordBoundary", "audio"] * 3 + ["TurnEnd"]
+    assert audio(messages) == [FRAME] * 3
+
+
+def test_stream_into_writes_views_of_received_messages(
+    transport: Type[FakeTransport],
+) -> None:
+    written: List[Union[bytes, memoryview]] = []
+    boundaries: List[TTSChunk] = []
+
+    class Writer:  # pylint: disable=too-few-public-methods
+        """A writer that keeps what it is handed."""
+
+        def write(self, data: Union[bytes, memoryview]) -> None:
+            written.append(data)
+
+    async def main() -> int:
+        async with CommunicatePool(1, transport=transport) as pool:
+            communicate = Communicate("one two", pool=pool, boundary="WordBoundary")
+            return await communicate.stream_into(Writer(), boundaries.append)
+
+    assert asyncio.run(main()) == 2 * len(FRAME)
+    assert [boundary["text"] for boundary in boundaries] == ["one", "two"]
+    assert written == [FRAME, FRAME]
+    for data in written:
+        # No copy was made of the audio before it was handed to the writer.
+        assert isinstance(data, memoryview)
+        assert isinstance(data.obj, bytes) and len(data.obj) > len(FRAME)
+
+
+def test_turn_end_offsets(transport: Type[FakeTransport]) -> None:
+    messages = stream(
+        transport,
+        "One two. Three four five.",
+        boundary="WordBoundary",
+        split_sentences=True,
+    )
+    boundaries = [m for m in messages if m["type"] == "WordBoundary"]
+    turn_ends = [m for m in messages if m["type"] == "TurnEnd"]
+    # The turns are placed one after the other by the duration of their audio.
+    assert [(m["offset"], m["duration"]) for m in turn_ends] == [
+        (0, 2 * FRAME_TICKS),
+        (2 * FRAME_TICKS, 3 * FRAME_TICKS),
+    ]
+    assert [m["offset"] for m in boundaries] == [i * FRAME_TICKS for i in range(5)]
+    assert [m["text"] for m in boundaries] == ["One", "two.", "Three", "four", "five."]
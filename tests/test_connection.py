@@ -0,0 +1,90 @@
+"""Tests of the reuse and retirement of the connections of CommunicatePool."""
+
+import asyncio
+from typing import Type
+
+from conftest import OPEN_TIME, FakeTransport, collect
+
+from edge_tts import Communicate, CommunicatePool
+
+
+def test_idle_connection_is_reused(transport: Type[FakeTransport]) -> None:
+    async def main() -> CommunicatePool:
+        async with CommunicatePool(2, transport=transport) as pool:
+            for _ in range(3):
+                await collect(Communicate("Hello world", pool=pool))
+            return pool
+
+    pool = asyncio.run(main())
+    assert len(transport.opened) == 1
+    assert transport.opened[0].turns == 3
+    # The second and third turns did not have to wait for a connection.
+    assert pool.latency_saved >= 2 * OPEN_TIME
+
+
+def test_closed_connection_is_retired(transport: Type[FakeTransport]) -> None:
+    async def main() -> None:
+        async with CommunicatePool(2, transport=transport) as pool:
+            await collect(Communicate("Hello world", pool=pool))
+            await transport.opened[0].close()
+            await collect(Communicate("Hello world", pool=pool))
+
+    asyncio.run(main())
+    assert len(transport.opened) == 2
+    assert transport.opened[1].turns == 1
+
+
+def test_connection_idle_for_too_long_is_retired(
+    transport: Type[FakeTransport],
+) -> None:
+    async def main() -> None:
+        async with CommunicatePool(2, transport=transport, max_idle_time=0.0) as pool:
+            for _ in range(2):
+                await collect(Communicate("Hello world", pool=pool))
+
+    asyncio.run(main())
+    assert len(transport.opened) == 2
+    assert transport.opened[0].closed
+
+
+def test_connection_with_other_config_makes_room(
+    transport: Type[FakeTransport],
+) -> None:
+    async def main() -> None:
+        async with CommunicatePool(1, transport=transport) as pool:
+            await collect(Communicate("Hello", pool=pool, boundary="WordBoundary"))
+            await collect(Communicate("Hello", pool=pool, boundary="SentenceBoundary"))
+
+    asyncio.run(main())
+    assert len(transport.opened) == 2
+    assert transport.opened[0].closed
+
+
+def test_prepare_opens_connection_ahead(transport: Type[FakeTransport]) -> None:
+    async def main() -> Communicate:
+        async with CommunicatePool(1, transport=transport) as pool:
+            communicate = Communicate("Hello world", pool=pool)
+            await communicate.prepare()
+            assert len(transport.opened) == 1
+            assert transport.opened[0].turns == 0
+            await collect(communicate)
+            return communicate
+
+    communicate = asyncio.run(main())
+    assert len(transport.opened) == 1
+    assert transport.opened[0].turns == 1
+    assert communicate.latency_saved >= OPEN_TIME
+
+
+def test_warm_opens_connections_next_to_idle_ones(
+    transport: Type[FakeTransport],
+) -> None:
+    async def main() -> int:
+        async with CommunicatePool(3, transport=transport) as pool:
+            tts_config = Communicate("Hello").tts_config
+            await pool.warm(tts_config)
+            await pool.warm(tts_config, 3)
+            return len(pool.idle)
+
+    assert asyncio.run(main()) == 3
+    assert len(transport.opened) == 3
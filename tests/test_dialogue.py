@@ -0,0 +1,64 @@
+"""Tests of dialogues, over the fake service."""
+
+import asyncio
+import json
+from pathlib import Path
+from typing import List, Type
+
+from conftest import FRAME, FRAME_TICKS, FakeTransport
+
+from edge_tts import CommunicatePool, Dialogue, DialogueSegment
+from edge_tts.typing import TTSChunk
+
+SEGMENTS = [
+    DialogueSegment("en-US-AriaNeural", "one two", speaker="Aria"),
+    DialogueSegment("en-US-GuyNeural", "three", speaker="Guy"),
+    DialogueSegment("en-US-AriaNeural", "four five", speaker="Aria"),
+]
+
+
+def test_speakers_and_offsets(transport: Type[FakeTransport]) -> None:
+    async def main() -> List[TTSChunk]:
+        async with CommunicatePool(2, transport=transport) as pool:
+            dialogue = Dialogue(SEGMENTS, pool=pool, concurrency=2)
+            return [message async for message in dialogue.stream()]
+
+    messages = asyncio.run(main())
+    boundaries = [m for m in messages if m["type"] == "SentenceBoundary"]
+    assert [(m["text"], m["speaker"]) for m in boundaries] == [
+        ("one", "Aria"),
+        ("two", "Aria"),
+        ("three", "Guy"),
+        ("four", "Aria"),
+        ("five", "Aria"),
+    ]
+    # Every segment starts where the audio of the one before it ends.
+    assert [m["offset"] for m in boundaries] == [i * FRAME_TICKS for i in range(5)]
+    assert [
+        (m["offset"], m["duration"]) for m in messages if m["type"] == "TurnEnd"
+    ] == [
+        (0, 2 * FRAME_TICKS),
+        (2 * FRAME_TICKS, FRAME_TICKS),
+        (3 * FRAME_TICKS, 2 * FRAME_TICKS),
+    ]
+    assert b"".join(m["data"] for m in messages if m["type"] == "audio") == FRAME * 5
+
+
+def test_save(transport: Type[FakeTransport], tmp_path: Path) -> None:
+    audio_path, metadata_path = tmp_path / "dialogue.mp3", tmp_path / "dialogue.jsonl"
+
+    async def main() -> None:
+        async with CommunicatePool(2, transport=transport) as pool:
+            dialogue = Dialogue(SEGMENTS, pool=pool)
+            await dialogue.save(str(audio_path), str(metadata_path))
+
+    asyncio.run(main())
+    assert audio_path.read_bytes() == FRAME * 5
+    lines = [json.loads(line) for line in metadata_path.read_text().splitlines()]
+    assert [(line["speaker"], line["offset"]) for line in lines] == [
+        ("Aria", 0),
+        ("Aria", FRAME_TICKS),
+        ("Guy", 2 * FRAME_TICKS),
+        ("Aria", 3 * FRAME_TICKS),
+        ("Aria", 4 * FRAME_TICKS),
+    ]
@@ -0,0 +1,115 @@
+"""Tests of the parsing of audio.metadata messages."""
+
+import json
+import random
+from typing import Any, Dict, List
+
+import pytest
+
+from edge_tts import metadata
+from edge_tts.exceptions import UnexpectedResponse, UnknownResponse
+from edge_tts.metadata import extract_boundary, parse_metadata
+from edge_tts.typing import TTSChunk
+
+
+def message(text: str, boundary_type: str = "WordBoundary") -> str:
+    """Returns the body of an audio.metadata message as the service sends it."""
+    boundary: Dict[str, Any] = {
+        "Type": boundary_type,
+        "Data": {
+            "Offset": 1_000_000,
+            "Duration": 3_250_000,
+            "text": {"Text": text, "Length": len(text), "BoundaryType": boundary_type},
+        },
+    }
+    return json.dumps(
+        {"Metadata": [boundary]}, ensure_ascii=False, separators=(",", ":")
+    )
+
+
+def decode(data: str, monkeypatch: pytest.MonkeyPatch) -> TTSChunk:
+    """Parses the message with the decoder only."""
+    with monkeypatch.context() as patch:
+        patch.setattr(metadata, "extract_boundary", lambda data: None)
+        return parse_metadata(data)
+
+
+@pytest.mark.parametrize(
+    "text", ["Hello", "", "Tom &amp; Jerry", "&lt;tag&gt;", "你好。", "naïve 😀"]
+)
+@pytest.mark.parametrize("boundary_type", ["WordBoundary", "SentenceBoundary"])
+def test_extract_matches_decoder(
+    text: str, boundary_type: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    data = message(text, boundary_type)
+    boundary = extract_boundary(data)
+    assert boundary is not None
+    assert boundary == decode(data, monkeypatch)
+    assert boundary == parse_metadata(data)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        message('He said "Hi"'),
+        message("back\\slash"),
+        message("tab\there"),
+        json.dumps(json.loads(message("é")), separators=(",", ":")),
+        json.dumps(json.loads(message("Hello"))),
+    ],
+)
+def test_other_formats_are_decoded(data: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    assert extract_boundary(data) is None
+    assert parse_metadata(data) == decode(data, monkeypatch)
+
+
+def test_extract_matches_decoder_on_random_texts(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    rng = random.Random(0)
+    pieces = [
+        "a",
+        "Z",
+        " ",
+        "&amp;",
+        "&",
+        ";",
+        '"',
+        "\\",
+        "\n",
+        "é",
+        "你",
+        "😀",
+        "{",
+        "}",
+    ]
+    extracted = 0
+    for _ in range(500):
+        data = message("".join(rng.choice(pieces) for _ in range(rng.randint(0, 8))))
+        boundary = extract_boundary(data)
+        if boundary is not None:
+            extracted += 1
+            assert boundary == decode(data, monkeypatch), data
+    assert extracted > 0
+
+
+def test_session_end_is_skipped() -> None:
+    session_end = {"Type": "SessionEnd", "Data": {"Offset": 0}}
+    boundary = json.loads(message("Hello"))["Metadata"][0]
+    data = json.dumps({"Metadata": [session_end, boundary]})
+    assert extract_boundary(data) is None
+    assert parse_metadata(data)["text"] == "Hello"
+
+
+def test_unknown_metadata() -> None:
+    with pytest.raises(UnknownResponse):
+        parse_metadata(message("Hello", "Viseme"))
+
+
+def test_no_boundary() -> None:
+    data = json.dumps({"Metadata": [{"Type": "SessionEnd", "Data": {}}]})
+    with pytest.raises(UnexpectedResponse):
+        parse_metadata(data)
+    empty: List[Any] = []
+    with pytest.raises(UnexpectedResponse):
+        parse_metadata(json.dumps({"Metadata": empty}))
@@ -0,0 +1,128 @@
+"""Tests of the protocol core, which parses messages without any I/O."""
+
+from typing import Optional
+
+import pytest
+from conftest import FRAME, binary_message, text_message
+
+from edge_tts.constants import DEFAULT_VOICE
+from edge_tts.data_classes import TTSConfig
+from edge_tts.exceptions import NoAudioReceived, UnexpectedResponse, UnknownResponse
+from edge_tts.protocol import TurnProtocol, parse_binary_message, parse_text_message
+
+
+def turn(boundary: Optional[str] = "WordBoundary") -> TurnProtocol:
+    """Returns the protocol of a turn in the default output format."""
+    tts_config = TTSConfig(DEFAULT_VOICE, "+0%", "+0%", "+0Hz", boundary)  # type: ignore
+    return TurnProtocol(tts_config, b"Hello")
+
+
+def test_text_message() -> None:
+    assert parse_text_message(text_message("turn.end", "{}")) == ("turn.end", "{}")
+
+
+def test_text_message_path_inside_other_header() -> None:
+    message = "X-Path:response\r\nPath:turn.start\r\n\r\n{}"
+    assert parse_text_message(message) == ("turn.start", "{}")
+    assert parse_text_message("X-Path:response\r\n\r\n{}") == (None, "{}")
+
+
+def test_text_message_without_body() -> None:
+    assert parse_text_message("Path:turn.end") == ("turn.end", "")
+
+
+def test_binary_message() -> None:
+    message = binary_message(FRAME)
+    path, content_type, payload = parse_binary_message(message)
+    assert (path, content_type) == (b"audio", b"audio/mpeg")
+    assert payload == FRAME
+    # The payload is a view of the message instead of a copy.
+    assert payload.obj is message
+
+
+def test_binary_message_headers_inside_other_headers() -> None:
+    headers = b"X-Path:x\r\nX-Content-Type:y\r\nContent-Type:audio/mpeg\r\nPath:audio"
+    message = len(headers).to_bytes(2, "big") + headers + FRAME
+    path, content_type, payload = parse_binary_message(message)
+    assert (path, content_type) == (b"audio", b"audio/mpeg")
+    assert payload == FRAME
+
+
+@pytest.mark.parametrize("message", [b"", b"\x00"])
+def test_binary_message_too_short(message: bytes) -> None:
+    with pytest.raises(UnexpectedResponse):
+        parse_binary_message(message)
+
+
+@pytest.mark.parametrize("excess", [1, 2, 100])
+def test_binary_message_header_length_too_large(excess: int) -> None:
+    headers = b"Path:audio\r\n"
+    message = (len(headers) + excess).to_bytes(2, "big") + headers
+    with pytest.raises(UnexpectedResponse):
+        parse_binary_message(message)
+
+
+def test_turn() -> None:
+    protocol = turn()
+    assert "Path:ssml" in protocol.request()
+    assert protocol.receive(text_message("turn.start", "{}")) is None
+    metadata = (
+        '{"Metadata":[{"Type":"WordBoundary","Data":{"Offset":0,"Duration":240000,'
+        '"text":{"Text":"Hello","Length":5,"BoundaryType":"WordBoundary"}}}]}'
+    )
+    assert protocol.receive(text_message("audio.metadata", metadata)) == {
+        "type": "WordBoundary",
+        "offset": 0,
+        "duration": 240000,
+        "text": "Hello",
+    }
+    message = protocol.receive(binary_message(FRAME))
+    assert message is not None and message["type"] == "audio"
+    assert message["data"] == FRAME
+    assert protocol.receive(binary_message(b"", None)) is None
+    assert not protocol.ended
+    assert protocol.receive(text_message("turn.end", "{}")) is None
+    assert protocol.ended
+
+
+def test_turn_without_boundaries_ignores_metadata() -> None:
+    protocol = turn(None)
+    assert protocol.receive(text_message("audio.metadata", "{}")) is None
+
+
+def test_content_type_parameters_are_ignored() -> None:
+    message = turn().receive(binary_message(FRAME, "audio/mpeg; codecs=mp3"))
+    assert message is not None and message["data"] == FRAME
+
+
+def test_wrong_content_type() -> None:
+    with pytest.raises(UnexpectedResponse):
+        turn().receive(binary_message(FRAME, "audio/ogg"))
+
+
+def test_empty_payload() -> None:
+    with pytest.raises(UnexpectedResponse):
+        turn().receive(binary_message(b""))
+
+
+def test_payload_without_content_type() -> None:
+    with pytest.raises(UnexpectedResponse):
+        turn().receive(binary_message(FRAME, None))
+
+
+def test_binary_message_with_other_path() -> None:
+    headers = b"Path:video\r\nContent-Type:audio/mpeg\r\n"
+    with pytest.raises(UnexpectedResponse):
+        turn().receive(len(headers).to_bytes(2, "big") + headers + FRAME)
+
+
+def test_turn_end_without_audio() -> None:
+    protocol = turn()
+    protocol.receive(text_message("turn.start", "{}"))
+    with pytest.raises(NoAudioReceived):
+        protocol.receive(text_message("turn.end", "{}"))
+
+
+def test_unknown_path() -> None:
+    with pytest.raises(UnknownResponse):
+        turn().receive(text_message("audio.unknown", "{}"))
@@ -0,0 +1,170 @@
+"""Tests of the runner, which runs coroutines and async generators on an event
+loop in a background thread."""
+
+import asyncio
+import threading
+from typing import AsyncGenerator, Iterator, List
+
+import pytest
+
+from edge_tts.runner import LoopRunner
+
+
+@pytest.fixture(name="runner")
+def fixture_runner() -> Iterator[LoopRunner]:
+    """A runner that is closed after the test."""
+    runner = LoopRunner()
+    yield runner
+    runner.close()
+
+
+async def numbers(produced: List[int], count: int) -> AsyncGenerator[int, None]:
+    """Yields the numbers up to count, and records each one it produced."""
+    for i in range(count):
+        produced.append(i)
+        yield i
+        await asyncio.sleep(0)
+
+
+def test_run(runner: LoopRunner) -> None:
+    async def loop_thread() -> str:
+        return threading.current_thread().name
+
+    assert runner.run(loop_thread()) == "edge-tts"
+
+
+def test_run_raises(runner: LoopRunner) -> None:
+    async def fail() -> None:
+        raise ValueError("failed")
+
+    with pytest.raises(ValueError, match="failed"):
+        runner.run(fail())
+
+
+def test_iterate(runner: LoopRunner) -> None:
+    produced: List[int] = []
+    assert list(runner.iterate(numbers(produced, 10), 2)) == list(range(10))
+
+
+def test_iterate_backpressure(runner: LoopRunner) -> None:
+    produced: List[int] = []
+    items = runner.iterate(numbers(produced, 100), 2)
+    assert next(items) == 0
+    runner.run(asyncio.sleep(0.05))
+    # The first item was taken, two are queued, and the generator is waiting
+    # for a slot to put the fourth one.
+    assert produced == [0, 1, 2, 3]
+    assert next(items) == 1
+    runner.run(asyncio.sleep(0.05))
+    assert produced == [0, 1, 2, 3, 4]
+    items.close()
+
+
+def test_iterate_closed_early(runner: LoopRunner) -> None:
+    closed = False
+
+    async def generate() -> AsyncGenerator[int, None]:
+        nonlocal closed
+        try:
+            while True:
+                yield 0
+        finally:
+            closed = True
+
+    items = runner.iterate(generate(), 2)
+    assert next(items) == 0
+    items.close()
+    # The generator was closed before close() returned.
+    assert closed
+
+
+def test_iterate_raises(runner: LoopRunner) -> None:
+    async def generate() -> AsyncGenerator[int, None]:
+        yield 0
+        yield 1
+        raise ValueError("failed")
+
+    received: List[int] = []
+    with pytest.raises(ValueError, match="failed"):
+        for item in runner.iterate(generate(), 1):
+            received.append(item)
+    assert received == [0, 1]
+
+
+def test_run_from_loop(runner: LoopRunner) -> None:
+    async def nested() -> None:
+        runner.run(asyncio.sleep(0))
+
+    with pytest.raises(RuntimeError):
+        runner.run(nested())
+
+
+def test_restart_after_close(runner: LoopRunner) -> None:
+    runner.run(asyncio.sleep(0))
+    runner.close()
+    assert runner.run(asyncio.sleep(0, "again")) == "again"
+
+
+def test_close_while_running(runner: LoopRunner) -> None:
+    started = threading.Event()
+    cancelled = False
+
+    async def wait_forever() -> None:
+        nonlocal cancelled
+        started.set()
+        try:
+            await asyncio.Event().wait()
+        finally:
+            cancelled = True
+
+    errors: List[BaseException] = []
+
+    def run() -> None:
+        try:
+            runner.run(wait_forever())
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    assert started.wait(1)
+    runner.close()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert cancelled and len(errors) == 1
+
+
+def test_close_while_iterating(runner: LoopRunner) -> None:
+    async def generate() -> AsyncGenerator[int, None]:
+        yield 0
+        await asyncio.Event().wait()
+        yield 1
+
+    received: List[int] = []
+    errors: List[BaseException] = []
+
+    def iterate() -> None:
+        try:
+            for item in runner.iterate(generate(), 1):
+                received.append(item)
+        except RuntimeError as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=iterate)
+    thread.start()
+    runner.run(asyncio.sleep(0.05))
+    runner.close()
+    thread.join(1)
+    assert not thread.is_alive()
+    assert received == [0] and len(errors) == 1
+
+
+def test_close_runs_cleanup(runner: LoopRunner) -> None:
+    cleaned_up_on: List[str] = []
+
+    async def cleanup() -> None:
+        cleaned_up_on.append(threading.current_thread().name)
+
+    runner.close(cleanup)
+    assert cleaned_up_on == ["edge-tts"]
+    assert runner.loop is None
@@ -0,0 +1,128 @@
+"""Tests of the preparation and splitting of text."""
+
+import random
+from typing import Generator, List
+
+import pytest
+
+from edge_tts.text import _prepare_block, _TextSplitter, split_text_by_byte_length
+
+
+def split_like_before(text: bytes, byte_length: int) -> Generator[bytes, None, None]:
+    """The splitter as it was before it scanned the text with a cursor."""
+    while len(text) > byte_length:
+        split_at = text.rfind(b"\n", 0, byte_length)
+        if split_at < 0:
+            split_at = text.rfind(b" ", 0, byte_length)
+        if split_at < 0:
+            split_at = len(text)
+            while split_at > 0:
+                try:
+                    text[:split_at].decode("utf-8")
+                    break
+                except UnicodeDecodeError:
+                    split_at -= 1
+        while split_at > 0 and b"&" in text[:split_at]:
+            ampersand_index = text.rindex(b"&", 0, split_at)
+            if text.find(b";", ampersand_index, split_at) != -1:
+                break
+            split_at = ampersand_index
+        chunk = text[:split_at].strip()
+        if chunk:
+            yield chunk
+        text = text[split_at if split_at > 0 else 1 :]
+    if text.strip():
+        yield text.strip()
+
+
+def split_fragments(fragments: List[str], byte_length: int = 4096) -> List[bytes]:
+    """Splits the fragments of a text at sentences, as they are received."""
+    splitter = _TextSplitter(byte_length, sentences=True)
+    chunks: List[bytes] = []
+    for fragment in fragments:
+        chunks.extend(splitter.feed(_prepare_block(fragment)))
+    chunks.extend(splitter.close())
+    return chunks
+
+
+def test_sentences() -> None:
+    text = 'He said "Hi." Then left!\n「你好。」他说。π is 3.14, wait… ok?'
+    assert split_fragments([text]) == [
+        b'He said "Hi."',
+        b"Then left!",
+        "「你好。」".encode("utf-8"),
+        "他说。".encode("utf-8"),
+        "π is 3.14, wait…".encode("utf-8"),
+        b"ok?",
+    ]
+
+
+@pytest.mark.parametrize(
+    "fragments",
+    [
+        ["「你好。」", "他说。"],
+        ["你好。", "。他说。"],
+        ["你好。。", "他说。"],
+        ["你好！", "」他说。"],
+        ["Hi.", '" Bye.'],
+    ],
+)
+def test_sentences_at_end_of_fragment(fragments: List[str]) -> None:
+    assert split_fragments(fragments) == split_fragments(["".join(fragments)])
+
+
+@pytest.mark.parametrize("byte_length", [8, 16, 4096])
+def test_sentences_do_not_depend_on_fragments(byte_length: int) -> None:
+    rng = random.Random(byte_length)
+    pieces = ["。", "！", "？", "」", "』", "）", "”", '"', ".", "!", "?", "…"]
+    pieces += [" ", "\n", "你好", "他说", "Hi", "3.14", "&"]
+    for _ in range(300):
+        text = "".join(rng.choice(pieces) for _ in range(rng.randint(1, 30)))
+        cuts = sorted(rng.sample(range(len(text) + 1), rng.randint(0, len(text))))
+        fragments = [text[i:j] for i, j in zip([0] + cuts, cuts + [len(text)])]
+        assert split_fragments(fragments, byte_length) == split_fragments(
+            [text], byte_length
+        ), fragments
+
+
+@pytest.mark.parametrize("byte_length", [8, 16, 64])
+def test_same_chunks_as_before(byte_length: int) -> None:
+    rng = random.Random(byte_length)
+    # Every window of 7 bytes holds a space or newline.
+    words = ["a", "hello", "&amp;", "&lt;", "π", "你好", "😀"]
+    for _ in range(300):
+        text = "".join(
+            rng.choice(words) + rng.choice([" ", "  ", "\n", " \n"])
+            for _ in range(rng.randint(0, 40))
+        ).encode("utf-8")
+        assert list(split_text_by_byte_length(text, byte_length)) == list(
+            split_like_before(text, byte_length)
+        ), text
+
+
+def test_entity_is_not_split() -> None:
+    assert list(split_text_by_byte_length(b"aaaa&amp;bb", 7)) == [
+        b"aaaa",
+        b"&amp;bb",
+    ]
+    assert list(split_text_by_byte_length(b"aa &lt; b", 5)) == [b"aa", b"&lt;", b"b"]
+
+
+@pytest.mark.parametrize("byte_length", [4, 5, 7, 8])
+def test_utf8_characters_are_not_split(byte_length: int) -> None:
+    text = "你好世界😀π" * 5
+    chunks = list(split_text_by_byte_length(text, byte_length))
+    assert all(len(chunk) <= byte_length for chunk in chunks)
+    assert "".join(chunk.decode("utf-8") for chunk in chunks) == text
+
+
+def test_window_without_whitespace() -> None:
+    # The old splitter looked for a UTF-8 boundary in the whole remaining
+    # text, and yielded all of it as a single oversized chunk.
+    text = b"abcdefghij" * 2 + b" end"
+    assert list(split_like_before(text, 8)) == [text]
+    assert list(split_text_by_byte_length(text, 8)) == [
+        b"abcdefgh",
+        b"ijabcdef",
+        b"ghij end",
+    ]
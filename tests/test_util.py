@@ -0,0 +1,60 @@
+"""Tests of the command line."""
+
+import asyncio
+import sys
+from pathlib import Path
+from typing import Optional
+
+import pytest
+
+from edge_tts.constants import DEFAULT_OUTPUT_FORMAT
+from edge_tts.data_classes import UtilArgs
+from edge_tts.util import _output_format, amain
+
+
+def args(write_media: Optional[str], output_format: Optional[str] = None) -> UtilArgs:
+    """Returns the arguments of the command line with the given options."""
+    return UtilArgs(write_media=write_media, output_format=output_format)
+
+
+@pytest.mark.parametrize(
+    "write_media, output_format",
+    [
+        ("audio.mp3", DEFAULT_OUTPUT_FORMAT),
+        ("audio.webm", "webm-24khz-16bit-mono-opus"),
+        ("audio.ogg", "ogg-24khz-16bit-mono-opus"),
+        ("audio.pcm", "raw-24khz-16bit-mono-pcm"),
+        ("AUDIO.PCM", "raw-24khz-16bit-mono-pcm"),
+        ("audio.wav", DEFAULT_OUTPUT_FORMAT),
+        ("audio", DEFAULT_OUTPUT_FORMAT),
+        ("-", DEFAULT_OUTPUT_FORMAT),
+        (None, DEFAULT_OUTPUT_FORMAT),
+    ],
+)
+def test_format_from_extension(write_media: Optional[str], output_format: str) -> None:
+    assert _output_format(args(write_media)) == output_format
+
+
+def test_explicit_format_wins() -> None:
+    assert (
+        _output_format(args("audio.pcm", "audio-24khz-96kbitrate-mono-mp3"))
+        == "audio-24khz-96kbitrate-mono-mp3"
+    )
+
+
+def test_missing_file_keeps_media(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    media = tmp_path / "audio.mp3"
+    media.write_bytes(b"audio")
+    argv = [
+        "edge-tts",
+        "-f",
+        str(tmp_path / "missing.txt"),
+        "--write-media",
+        str(media),
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(amain())
+    assert media.read_bytes() == b"audio"
@@ -0,0 +1,82 @@
+"""Tests of the destinations FileWriter writes to."""
+
+import asyncio
+import os
+import stat
+import threading
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from edge_tts.writer import FileWriter
+
+
+def write(path: Path, chunks: List[bytes], fail: bool = False) -> None:
+    """Writes the given chunks with a FileWriter, and fails midway if asked."""
+
+    async def main() -> None:
+        async with FileWriter(path, buffer_size=4) as writer:
+            for i, chunk in enumerate(chunks):
+                if fail and i == len(chunks) // 2:
+                    raise RuntimeError("failed")
+                pending = writer.write(chunk)
+                if pending is not None:
+                    await pending
+
+    asyncio.run(main())
+
+
+def test_new_file(tmp_path: Path) -> None:
+    path = tmp_path / "audio.mp3"
+    write(path, [b"abc", b"def", b"ghi"])
+    assert path.read_bytes() == b"abcdefghi"
+    assert os.listdir(tmp_path) == ["audio.mp3"]
+
+
+def test_existing_file_keeps_mode(tmp_path: Path) -> None:
+    path = tmp_path / "audio.mp3"
+    path.write_bytes(b"old")
+    path.chmod(0o640)
+    write(path, [b"new"])
+    assert path.read_bytes() == b"new"
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
+
+
+def test_failure_keeps_existing_file(tmp_path: Path) -> None:
+    path = tmp_path / "audio.mp3"
+    path.write_bytes(b"old")
+    with pytest.raises(RuntimeError):
+        write(path, [b"abc", b"def", b"ghi", b"jkl"], fail=True)
+    assert path.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["audio.mp3"]
+
+
+def test_symlink_is_kept(tmp_path: Path) -> None:
+    target = tmp_path / "target.mp3"
+    target.write_bytes(b"old")
+    link = tmp_path / "audio.mp3"
+    link.symlink_to(target)
+    write(link, [b"new"])
+    assert link.is_symlink()
+    assert target.read_bytes() == b"new"
+    assert sorted(os.listdir(tmp_path)) == ["audio.mp3", "target.mp3"]
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="needs named pipes")
+def test_fifo_is_written_directly(tmp_path: Path) -> None:
+    path = tmp_path / "audio.fifo"
+    os.mkfifo(path)
+    received: List[bytes] = []
+
+    def read() -> None:
+        with open(path, "rb") as fifo:
+            received.append(fifo.read())
+
+    reader = threading.Thread(target=read)
+    reader.start()
+    write(path, [b"abc", b"def"])
+    reader.join()
+    assert received == [b"abcdef"]
+    assert stat.S_ISFIFO(path.stat().st_mode)
+    assert os.listdir(tmp_path) == ["audio.fifo"]